@@ -0,0 +1,69 @@
+# coding=utf-8
+
+import numpy as np
+
+
+# Class to accelerate a fixed-point iteration x = g(x) with Anderson mixing: the next iterate is the combination of the
+# last few evaluations of g(x) which minimizes the combined residual g(x) - x. Every evaluation requires a job to be
+# run, therefore the history of the previous iterates and evaluations is kept to extrapolate from
+class AndersonAccelerator:
+    # Relative tolerance for the singular values of the residual history in the least squares problem
+    RCOND = 1e-10
+
+    def __init__(self, depth, safeguard=1.0):
+        # Define fields
+        self.depth = depth
+        self.safeguard = safeguard
+        # Differences between consecutive residuals and evaluations
+        self.residual_differences = []
+        self.evaluation_differences = []
+        # Residual and evaluation of the previous iterate
+        self.residual = None
+        self.evaluation = None
+        self.residual_norm = None
+
+    # Returns the next iterate from the current iterate x and its evaluation g(x), which may be arrays of any shape (e.g.
+    # stresses of shape (N, 6)). The arrays are mixed as flat vectors, so that every entry of the history gets a single
+    # weight, and the next iterate is returned in the shape of x
+    def accelerate(self, x, g):
+        shape = np.shape(x)
+        x = np.asarray(x, dtype=np.float64).ravel()
+        g = np.asarray(g, dtype=np.float64).ravel()
+        residual = g - x
+        residual_norm = np.linalg.norm(residual)
+        if self.residual is not None:
+            if residual_norm > self.safeguard*self.residual_norm:
+                # The residual grew, the history no longer describes the iteration well, fall back to plain iteration
+                print('---> Residual increased, restarting acceleration')
+                self.reset()
+            else:
+                # Extend the history, and drop the oldest entries beyond the history depth
+                self.residual_differences.append(residual - self.residual)
+                self.evaluation_differences.append(g - self.evaluation)
+                if len(self.residual_differences) > self.depth:
+                    self.residual_differences.pop(0)
+                    self.evaluation_differences.pop(0)
+        self.residual = residual
+        self.evaluation = g
+        self.residual_norm = residual_norm
+        # Without history, do a plain fixed-point step
+        if len(self.residual_differences) <= 0:
+            return g.reshape(shape)
+        # Find the combination of the history which minimizes the residual
+        residual_differences = np.column_stack(self.residual_differences)
+        evaluation_differences = np.column_stack(self.evaluation_differences)
+        gamma = np.linalg.lstsq(residual_differences, residual, rcond=self.RCOND)[0]
+        x_next = g - evaluation_differences.dot(gamma)
+        if not np.all(np.isfinite(x_next)):
+            print('---> Acceleration failed, restarting acceleration')
+            self.reset()
+            return g.reshape(shape)
+        return x_next.reshape(shape)
+
+    # Clears the history, the next step will be a plain fixed-point step
+    def reset(self):
+        self.residual_differences = []
+        self.evaluation_differences = []
+        self.residual = None
+        self.evaluation = None
+        self.residual_norm = None
@@ -0,0 +1,136 @@
+# coding=utf-8
+
+import json
+import os
+import numpy as np
+from MeshData import mesh_data_from_arrays
+from MeshData import mesh_data_to_arrays
+
+
+# Class to store the state of a run in binary files, so that the run can be resumed without characterizing the mesh and
+# rerunning the finished jobs again. The characterized mesh does not change during a run and is written once when the
+# run starts, after each iteration only the results, and for the substitution approach the current stresses, are written
+class Checkpoint:
+    def __init__(self, default_job):
+        # Define fields
+        self.file_name = default_job + '_Stress_Input_Checkpoint.npz'
+        self.results_file_name = default_job + '_Stress_Input_Checkpoint_Results.npz'
+        self.method = ''
+        self.parameters = {}
+        self.mesh_data = None
+        self.injections = {}
+        self.results = {}
+        self.completed = False
+        self.save_stresses = False
+
+    # Starts a new checkpoint for a run with the given method and parameters, and writes it to file, so that the run can
+    # be resumed if it is interrupted before the first update. If requested, the current stresses of the stress sets are
+    # written with every update, for runs which change the stresses
+    def start(self, method, parameters, mesh_data, injections, save_stresses=False):
+        self.method = method
+        self.parameters = parameters
+        self.mesh_data = mesh_data
+        self.injections = injections
+        self.results = {}
+        self.completed = False
+        self.save_stresses = save_stresses
+        # Remove the results of a previous run first, so that they can not be mistaken for results of this run
+        if os.path.isfile(self.results_file_name):
+            os.remove(self.results_file_name)
+        self.save_mesh()
+        self.save()
+
+    # Checks if a checkpoint file exists
+    def exists(self):
+        return os.path.isfile(self.file_name)
+
+    # Updates the results and writes them to file
+    def update(self, completed=False, **results):
+        self.results.update(results)
+        self.completed = completed
+        self.save()
+
+    # Writes the method, parameters, characterized mesh and injection offsets to file
+    def save_mesh(self):
+        arrays = mesh_data_to_arrays(self.mesh_data)
+        arrays['method'] = np.array(self.method)
+        arrays['parameters'] = np.array(json.dumps(self.parameters))
+        arrays['save_stresses'] = np.array(self.save_stresses)
+        for key in self.injections.keys():
+            arrays['injections_' + key] = np.asarray(self.injections[key])
+        write_arrays(self.file_name, arrays, True)
+
+    # Writes the results, and the current stresses if requested, to file
+    def save(self):
+        arrays = {'completed': np.array(self.completed)}
+        for key in self.results.keys():
+            arrays['results_' + key] = np.asarray(self.results[key])
+        if self.save_stresses:
+            for part_index in np.arange(0, len(self.mesh_data)):
+                if self.mesh_data[part_index] is not None:
+                    arrays['stresses_' + str(part_index)] = self.mesh_data[part_index].get_stress_set_stresses()
+        write_arrays(self.results_file_name, arrays, False)
+
+    # Reads the checkpoint from file, returns False if it could not be read
+    def load(self):
+        if not self.exists():
+            return False
+        arrays = read_arrays(self.file_name)
+        self.method = str(arrays['method'])
+        self.parameters = dict((str(key), to_str(value)) for key, value in json.loads(str(arrays['parameters'])).items())
+        self.save_stresses = bool(arrays['save_stresses'])
+        self.mesh_data = mesh_data_from_arrays(arrays)
+        self.injections = extract_arrays(arrays, 'injections_')
+        # Without results the run was interrupted before the first update
+        self.completed = False
+        self.results = {}
+        if os.path.isfile(self.results_file_name):
+            arrays = read_arrays(self.results_file_name)
+            self.completed = bool(arrays['completed'])
+            self.results = extract_arrays(arrays, 'results_')
+            # Restore the stresses of the last update
+            stresses = extract_arrays(arrays, 'stresses_')
+            for key in stresses.keys():
+                part_stresses = stresses[key]
+                self.mesh_data[int(key)].define_stress_set_stresses(part_stresses,
+                                                                    np.all(np.isfinite(part_stresses), axis=1))
+        return True
+
+
+# Utility method to write arrays to a file, to a temporary file first, so that a crash while writing does not corrupt
+# the previous file
+def write_arrays(file_name, arrays, compressed):
+    temp_file_name = file_name[:-4] + '_Temp.npz'
+    if compressed:
+        np.savez_compressed(temp_file_name, **arrays)
+    else:
+        np.savez(temp_file_name, **arrays)
+    if os.path.isfile(file_name):
+        os.remove(file_name)
+    os.rename(temp_file_name, file_name)
+
+
+# Utility method to read all arrays from a file
+def read_arrays(file_name):
+    data = np.load(file_name)
+    arrays = {}
+    for key in data.files:
+        arrays[key] = data[key]
+    data.close()
+    return arrays
+
+
+# Utility method to fetch the arrays with keys starting with a prefix, with the prefix removed from the keys
+def extract_arrays(arrays, prefix):
+    extracted = {}
+    for key in arrays.keys():
+        if key.startswith(prefix):
+            extracted[key[len(prefix):]] = arrays[key]
+    return extracted
+
+
+# Utility method to convert unicode strings read from json back to regular strings
+def to_str(value):
+    if isinstance(value, basestring):
+        return str(value)
+    return value
@@ -0,0 +1,93 @@
+# coding=utf-8
+
+import mmap
+import os
+import numpy as np
+
+
+# Class indexing the keyword and comment lines (the lines starting with an asterisk) of an input file by their byte
+# offsets. The index is built in a single pass over the memory-mapped file, the data lines are never loaded, and ranges
+# of the file are copied by their offsets
+class InputDeckIndex:
+    # Size of the chunks in which ranges of the file are copied
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, file_name):
+        # Define fields
+        self.file_name = file_name
+        self.size = 0
+        self.offsets = np.zeros(0, dtype=np.int64)
+        self.lines = []
+        # Initialize
+        self.__build()
+
+    # Fetches the number of indexed lines
+    def __len__(self):
+        return len(self.lines)
+
+    # Fetches an indexed line, without its line ending
+    def get_line(self, index):
+        return self.lines[index]
+
+    # Fetches the byte offset at which an indexed line starts, the index after the last line gives the file size
+    def get_offset(self, index):
+        if index >= len(self.lines):
+            return self.size
+        return int(self.offsets[index])
+
+    # Finds the index of the first indexed line at or after start which starts with the prefix, returns -1 if there
+    # is no such line
+    def find(self, prefix, start=0):
+        for index in np.arange(start, len(self.lines)):
+            if self.lines[index].startswith(prefix):
+                return index
+        return -1
+
+    # Copies the bytes of the file between two offsets to an output file
+    def write_range(self, out, start, end):
+        if end <= start:
+            return
+        fid = open(self.file_name, 'rb')
+        fid.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = fid.read(min(remaining, self.CHUNK_SIZE))
+            if len(chunk) <= 0:
+                break
+            out.write(chunk)
+            remaining = remaining - len(chunk)
+        fid.close()
+
+    # Internal method to index the lines starting with an asterisk
+    def __build(self):
+        fid = open(self.file_name, 'rb')
+        self.size = os.fstat(fid.fileno()).st_size
+        if self.size <= 0:
+            fid.close()
+            return
+        data = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets = []
+        # Jump from keyword line to keyword line, the data lines in between are skipped by the search
+        if data[0:1] == b'*':
+            position = 0
+        else:
+            position = next_keyword_offset(data, 0)
+        while position >= 0:
+            end = data.find(b'\n', position)
+            if end < 0:
+                end = self.size
+            offsets.append(position)
+            self.lines.append(data[position:end].rstrip(b'\r'))
+            position = next_keyword_offset(data, end)
+        data.close()
+        fid.close()
+        self.offsets = np.array(offsets, dtype=np.int64)
+
+
+# Utility method to find the offset of the first line starting with an asterisk after a given offset in a memory-mapped
+# file, returns -1 if there is no such line
+def next_keyword_offset(data, start):
+    position = data.find(b'\n*', start)
+    if position < 0:
+        return -1
+    return position + 1
@@ -0,0 +1,93 @@
+# coding=utf-8
+
+import datetime
+import json
+import os
+import time
+
+
+# Class to record the wall time, cpu time and peak memory of the phases of a run, and the time spent writing, solving
+# and reading each job, which are written to a json report at the end of the run
+class Instrumentation:
+    def __init__(self, method=''):
+        # Define fields
+        self.method = method
+        self.started = datetime.datetime.now().isoformat()
+        self.start_wall_time = time.time()
+        self.start_cpu_time = get_cpu_time()
+        self.phases = []
+        self.jobs = []
+        self.job_indices = {}
+
+    # Calls a function and records its wall time, cpu time and the peak memory at its end as a phase of the run,
+    # returns the result of the function. Phases are listed in the order in which they start, including nested phases
+    def measure(self, name, function, *args, **kwargs):
+        wall_time = time.time()
+        cpu_time = get_cpu_time()
+        phase = {'name': name, 'start_time': wall_time - self.start_wall_time}
+        self.phases.append(phase)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            phase['wall_time'] = time.time() - wall_time
+            phase['cpu_time'] = get_cpu_time() - cpu_time
+            phase['peak_memory_bytes'] = get_peak_memory()
+
+    # Calls a function and adds its wall time to the time of an activity of a job (e.g. "write", "solve" or
+    # "odb_read"), returns the result of the function
+    def measure_job(self, job_name, activity, function, *args, **kwargs):
+        wall_time = time.time()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.add_job_value(job_name, activity + '_time', time.time() - wall_time)
+
+    # Adds to a value of a job
+    def add_job_value(self, job_name, key, value):
+        record = self.__get_job_record(job_name)
+        record[key] = record.get(key, 0) + value
+
+    # Writes the report to a json file
+    def write(self, file_name='stress_input_report.json'):
+        report = {
+            'method': self.method,
+            'started': self.started,
+            'wall_time': time.time() - self.start_wall_time,
+            'cpu_time': get_cpu_time() - self.start_cpu_time,
+            'peak_memory_bytes': get_peak_memory(),
+            'bytes_written': sum([job.get('bytes_written', 0) for job in self.jobs]),
+            'odb_read_time': sum([job.get('odb_read_time', 0.0) for job in self.jobs]),
+            'phases': self.phases,
+            'jobs': self.jobs,
+        }
+        fid = open(file_name, 'w')
+        json.dump(report, fid, indent=2, sort_keys=True)
+        fid.close()
+        print('--> Run report written to "' + file_name + '"')
+
+    # Internal method to fetch the record of a job, the record is created on first use
+    def __get_job_record(self, job_name):
+        if job_name not in self.job_indices:
+            self.job_indices[job_name] = len(self.jobs)
+            self.jobs.append({'name': job_name})
+        return self.jobs[self.job_indices[job_name]]
+
+
+# Utility method to fetch the cpu time (user and system) used by the process so far
+def get_cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+# Utility method to fetch the peak memory of the process so far in bytes, returns None if it is not available (e.g. on
+# Windows, where the resource module does not exist)
+def get_peak_memory():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if os.uname()[0] == 'Darwin':
+        return peak
+    return peak*1024
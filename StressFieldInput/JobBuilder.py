@@ -3,254 +3,498 @@
 import abaqus
 from abaqusConstants import *
 import numpy as np
+import os
+from InputDeckIndex import InputDeckIndex
+
+# Labels of the stress components in the order in which the stresses are stored and written to the input files
+STRESS_COMPONENTS = ['S11', 'S22', 'S33', 'S12', 'S13', 'S23']
 
 
 # Class with the single task of building stress input jobs from the default job
 class JobBuilder:
-    def __init__(self, default_job, mesh_data):
+    # Number of stress definition lines which are formatted at once
+    STRESS_CHUNK_SIZE = 4096
+
+    def __init__(self, default_job, mesh_data, use_includes=False, injections=None, stress_precision=12,
+                 cache_lines=False):
         # Define fields
         self.default_job = default_job
         self.mesh_data = mesh_data
+        self.use_includes = use_includes
+        self.stress_precision = stress_precision
+        self.cache_lines = cache_lines
+        self.line_cache = [None] * (0 if mesh_data is None else len(mesh_data))
         self.valid = mesh_data is not None
-        self.default_input = []
-        self.next_line = -1
+        self.input_index = None
+        self.heading_end = 0
+        self.set_injections = []
+        self.stress_injection = -1
         self.predefined = False
+        self.includes_written = False
+        self.bytes_written = 0
+        self.deviations = []
         # Initialize
-        self.__on_init()
+        self.__on_init(injections)
 
     # Checks if the job builder is valid
     def is_valid(self):
         return self.valid
 
+    # Fetches the byte offsets at which the element sets and stresses are injected, to restore them with a checkpoint
+    def get_injections(self):
+        return {
+            'input_size': self.input_index.size,
+            'heading_end': self.heading_end,
+            'set_injections': np.array(self.set_injections, dtype=np.int64).reshape(-1, 2),
+            'stress_injection': self.stress_injection,
+            'predefined': self.predefined,
+        }
+
+    # Fetches the name of the job for a given job name index
+    def get_job_name(self, job_name_index):
+        return self.default_job + '_Stress_Input_Scale_' + str(job_name_index)
+
     # Creates a job for a given strength scale
     def create_job(self, job_name_index, stress_scale):
-        # Create a copy of the default input
-        lines = self.default_input[:]
-        # Define injection index starting at the current next line
-        inject_index = self.next_line
-        # Put in the header for the predefined field
-        if not self.predefined:
-            lines[inject_index:inject_index] = ['** ']
-            inject_index = inject_index + 1
-            lines[inject_index:inject_index] = ['** PREDEFINED FIELDS']
-            inject_index = inject_index + 1
-            lines[inject_index:inject_index] = ['** ']
-            inject_index = inject_index + 1
-        lines[inject_index:inject_index] = ['*Initial Conditions, type=STRESS']
-        inject_index = inject_index + 1
-        # Iterate over part instances
-        for part_index in np.arange(0, len(self.mesh_data)):
-            mesh_data_part = self.mesh_data[part_index]
-            if mesh_data_part is None:
-                continue
-            # Iterate over the stress sets
-            for stress_set in mesh_data_part.get_stress_sets():
-                # Fetch the stress
-                stress = stress_set.get_stress()
-                if stress is None:
-                    continue
-                # Inject and scale in the input file
-                line = stress_set.get_instance_name() + '.' + stress_set.get_set_name() + ','
-                for stress_index in np.arange(0, len(stress)):
-                    line = line + str(stress_scale*stress[stress_index]) + ','
-                lines[inject_index:inject_index] = [line]
-        # Write the input file
-        input_file_name = self.default_job + '_Stress_Input_Scale_' + str(job_name_index) + '.inp'
-        out = open(input_file_name, 'w')
-        for line_index in np.arange(0, len(lines)):
-            out.write(lines[line_index] + '\n')
-        out.close()
+        # Open the input file
+        job_name = self.get_job_name(job_name_index)
+        input_file_name = job_name + '.inp'
+        if self.use_includes:
+            self.__write_include_input(job_name, stress_scale)
+        else:
+            out = open(input_file_name, 'wb')
+            # Write the default input up to the stress injection line, with the element sets
+            self.__write_head(out, False)
+            # Write the stress definitions
+            self.__write_stresses(out, stress_scale)
+            # Write the remainder of the default input
+            self.input_index.write_range(out, self.stress_injection, self.input_index.size)
+            self.__close(out)
         # Create job from the input file
-        job_name = self.default_job + '_Stress_Input_Scale_' + str(job_name_index)
         return abaqus.mdb.JobFromInputFile(job_name, input_file_name)
 
     def update_stress_from_odb(self, odb):
-        # Fetch general stress field output at the centre of the elements
-        step = odb.steps[odb.steps.keys()[len(odb.steps.keys()) - 1]]
-        frame = step.frames[len(step.frames) - 1]
-        stress_output = frame.fieldOutputs['S'].getSubset(position=CENTROID)
+        # Read the stresses at the centre of all elements at once
+        odb_stresses = read_centroid_stresses(odb)
+        # Reset the deviations
+        self.deviations = [None] * len(self.mesh_data)
         # Define maximum deviation
         max_dev = 0
         # Iterate over part instances
         for part_index in np.arange(0, len(self.mesh_data)):
             mesh_data_part = self.mesh_data[part_index]
-            if mesh_data_part is None:
+            if mesh_data_part is None or mesh_data_part.get_stress_set_count() <= 0:
                 continue
-            # Iterate over all stress sets
-            for stress_set in mesh_data_part.get_stress_sets():
-                # Fetch element data
-                instance_name = stress_set.get_instance_name().upper()  # In the ODB instance names are upper case
-                element_label = stress_set.get_label()
-                # Extract stress values for the element
-                mesh_element = odb.rootAssembly.instances[instance_name].elements[element_label - 1]
-                stress_values = stress_output.getSubset(region=mesh_element).values
-                if len(stress_values) != 1:
-                    print('Invalid stress state for element ' + instance_name + '.' + str(element_label))
-                    continue
-                # Fetch the old and new stress values
-                old_stress = stress_set.get_stress()
-                new_stress = stress_values[0].data
-                # Update the stress
-                stress_set.define_stress(
-                    [new_stress[0], new_stress[1], new_stress[2], new_stress[3], new_stress[4], new_stress[5]])
-                # Calculate and update deviation
-                dev = np.sqrt(
-                    (old_stress[0] - new_stress[0])*(old_stress[0] - new_stress[0])
-                    + (old_stress[1] - new_stress[1]) * (old_stress[1] - new_stress[1])
-                    + (old_stress[2] - new_stress[2]) * (old_stress[2] - new_stress[2])
-                    + (old_stress[3] - new_stress[3]) * (old_stress[3] - new_stress[3])
-                    + (old_stress[4] - new_stress[4]) * (old_stress[4] - new_stress[4])
-                    + (old_stress[5] - new_stress[5]) * (old_stress[5] - new_stress[5])
-                )/6
-                if dev > max_dev:
-                    max_dev = dev
+            # Fetch the stresses for the instance
+            instance_name = mesh_data_part.get_instance_name().upper()  # In the ODB instance names are upper case
+            if instance_name not in odb_stresses:
+                print('Invalid stress state for instance ' + instance_name)
+                continue
+            odb_labels, odb_values = odb_stresses[instance_name]
+            # Find the row in the odb stresses for the element of each stress set
+            element_labels = mesh_data_part.get_stress_set_labels()
+            rows = np.empty(max(element_labels.max(), odb_labels.max()) + 1, dtype=np.int64)
+            rows.fill(-1)
+            rows[odb_labels] = np.arange(0, len(odb_labels))
+            # Elements with more than one value, for instance shells with several section points, have an invalid state
+            rows[np.bincount(odb_labels, minlength=len(rows)) > 1] = -1
+            rows = rows[element_labels]
+            found = rows >= 0
+            for element_label in element_labels[~found]:
+                print('Invalid stress state for element ' + instance_name + '.' + str(element_label))
+            # Fetch the old and new stress values
+            old_stresses = mesh_data_part.get_stress_set_stresses()
+            new_stresses = old_stresses.copy()
+            new_stresses[found] = odb_values[rows[found]]
+            # Update the stresses
+            mesh_data_part.define_stress_set_stresses(new_stresses, np.all(np.isfinite(new_stresses), axis=1))
+            # Calculate and update deviation, stress sets without new stresses have no deviation
+            deviations = compute_deviations(old_stresses, new_stresses)
+            deviations[~found] = np.nan
+            self.deviations[part_index] = deviations
+            dev = deviations[np.isfinite(deviations)]
+            if len(dev) > 0 and dev.max() > max_dev:
+                max_dev = dev.max()
         # return the deviation
         return max_dev
 
+    # Writes the deviation of each stress set from the last update from an odb, together with the element labels
+    def write_deviations(self, file_name):
+        arrays = {}
+        for part_index in np.arange(0, len(self.mesh_data)):
+            deviations = self.deviations[part_index]
+            if deviations is None:
+                continue
+            mesh_data_part = self.mesh_data[part_index]
+            instance_name = mesh_data_part.get_instance_name()
+            arrays[instance_name + '_labels'] = mesh_data_part.get_stress_set_labels()
+            arrays[instance_name + '_deviations'] = deviations
+        np.savez(file_name, **arrays)
+
+    # Internal method to write an input file which includes the stresses and the parts shared between jobs
+    def __write_include_input(self, job_name, stress_scale):
+        # Write the shared include files once
+        if not self.includes_written:
+            self.__write_includes()
+            self.includes_written = True
+        # Write the stresses to their own include file
+        stress_file_name = job_name + '_Stresses.inp'
+        out = open(stress_file_name, 'wb')
+        self.__write_stresses(out, stress_scale)
+        self.__close(out)
+        # Write the main input file, the heading is kept in the main input file
+        out = open(job_name + '.inp', 'wb')
+        self.input_index.write_range(out, 0, self.heading_end)
+        out.write('*INCLUDE, INPUT=' + self.__get_include_file_name('Head') + '\n')
+        out.write('*INCLUDE, INPUT=' + stress_file_name + '\n')
+        out.write('*INCLUDE, INPUT=' + self.__get_include_file_name('Tail') + '\n')
+        self.__close(out)
+
+    # Internal method to write the include files shared between jobs
+    def __write_includes(self):
+        print('--> Writing shared include files')
+        # Write the element sets for each part
+        for offset, part_index in self.set_injections:
+            out = open(self.__get_include_file_name('Sets_' + str(part_index)), 'wb')
+            self.__write_element_sets(out, part_index)
+            self.__close(out)
+        # Write the default input up to the stress injection line, without the heading
+        out = open(self.__get_include_file_name('Head'), 'wb')
+        self.__write_head(out, True, self.heading_end)
+        self.__close(out)
+        # Write the remainder of the default input
+        out = open(self.__get_include_file_name('Tail'), 'wb')
+        self.input_index.write_range(out, self.stress_injection, self.input_index.size)
+        self.__close(out)
+
+    # Internal method to close an input file which has been written, counting the bytes written
+    def __close(self, out):
+        self.bytes_written = self.bytes_written + out.tell()
+        out.close()
+
+    # Internal method to get the name of an include file shared between jobs
+    def __get_include_file_name(self, name):
+        return self.default_job + '_Stress_Input_' + name + '.inp'
+
+    # Internal method to find the offset at which the heading of the default input ends
+    def __find_heading_end(self):
+        if len(self.input_index) <= 0 or self.input_index.get_offset(0) != 0 or \
+                self.input_index.get_line(0).upper()[:8] != '*HEADING':
+            return 0
+        # The heading ends at the next keyword line
+        for index in np.arange(1, len(self.input_index)):
+            line = self.input_index.get_line(index)
+            if line[:2] != '**':
+                return self.input_index.get_offset(index)
+        return self.input_index.size
+
+    # Internal method to write the default input up to the stress injection line, with the element sets
+    def __write_head(self, out, include_sets, start=0):
+        for offset, part_index in self.set_injections:
+            self.input_index.write_range(out, start, offset)
+            if include_sets:
+                out.write('*INCLUDE, INPUT=' + self.__get_include_file_name('Sets_' + str(part_index)) + '\n')
+            else:
+                self.__write_element_sets(out, part_index)
+            start = offset
+        self.input_index.write_range(out, start, self.stress_injection)
+
+    # Internal method to write the element set definitions for a part, runs of element labels with a constant stride
+    # are written as generated ranges, the remaining labels are added explicitly to the same element set
+    def __write_element_sets(self, out, part_index):
+        mesh_data_part = self.mesh_data[part_index]
+        names = mesh_data_part.get_stress_set_names()
+        # Find the ranges of element labels of all stress sets at once
+        member_offsets, member_indices = mesh_data_part.get_stress_set_members()
+        labels = mesh_data_part.get_element_data().get_labels()[member_indices]
+        range_offsets, ranges, label_offsets, labels = find_set_label_ranges(labels, member_offsets)
+        range_offsets = range_offsets.tolist()
+        ranges = ranges.tolist()
+        label_offsets = label_offsets.tolist()
+        labels = labels.tolist()
+        element_limit = 8
+        for index in np.arange(0, len(names)):
+            # Write the ranges
+            if range_offsets[index + 1] > range_offsets[index]:
+                out.write('*Elset, elset=' + names[index] + ', generate\n')
+                for first, last, stride in ranges[range_offsets[index]:range_offsets[index + 1]]:
+                    out.write(str(first) + ', ' + str(last) + ', ' + str(stride) + '\n')
+                if label_offsets[index + 1] <= label_offsets[index]:
+                    continue
+            # Write the element set definition
+            out.write('*Elset, elset=' + names[index] + '\n')
+            # Write the remaining elements, with a limited number of elements per line
+            for start in np.arange(label_offsets[index], label_offsets[index + 1], element_limit):
+                end = min(start + element_limit, label_offsets[index + 1])
+                out.write(', '.join([str(label) for label in labels[start:end]]) + ',\n')
+
+    # Internal method to write the scaled stress definitions to a file
+    def __write_stresses(self, out, stress_scale):
+        # Put in the header for the predefined field
+        if not self.predefined:
+            out.write('** \n')
+            out.write('** PREDEFINED FIELDS\n')
+            out.write('** \n')
+        out.write('*Initial Conditions, type=STRESS\n')
+        # Each line holds the set name and the six stress components with the requested number of significant digits
+        line_format = '%s' + (',%.' + str(self.stress_precision) + 'g')*6 + ',\n'
+        # Iterate over part instances
+        for part_index in np.arange(0, len(self.mesh_data)):
+            mesh_data_part = self.mesh_data[part_index]
+            if mesh_data_part is None:
+                continue
+            # Fetch the stresses of the stress sets which have a stress defined, and scale them
+            stresses = mesh_data_part.get_stress_set_stresses()
+            rows = np.nonzero(np.all(np.isfinite(stresses), axis=1))[0]
+            if len(rows) <= 0:
+                continue
+            stresses = stress_scale*stresses[rows]
+            # Reuse the cached lines of the stress sets of which the stresses have not changed
+            if self.cache_lines:
+                lines = self.__get_cached_stress_lines(part_index, rows, stresses, line_format)
+                for start in np.arange(0, len(rows), self.STRESS_CHUNK_SIZE):
+                    out.write(''.join(lines[start:start + self.STRESS_CHUNK_SIZE].tolist()))
+                continue
+            instance_name = mesh_data_part.get_instance_name()
+            set_names = mesh_data_part.get_stress_set_names()
+            # Format and write the lines in chunks
+            for start in np.arange(0, len(rows), self.STRESS_CHUNK_SIZE):
+                end = min(start + self.STRESS_CHUNK_SIZE, len(rows))
+                names = [instance_name + '.' + set_names[row] for row in rows[start:end]]
+                out.write(format_stress_lines(line_format, names, stresses[start:end]))
+
+    # Internal method to fetch the stress definition lines for the given rows of stress sets of an instance, only the
+    # lines of the stress sets of which the stresses differ from the last job are formatted
+    def __get_cached_stress_lines(self, part_index, rows, stresses, line_format):
+        mesh_data_part = self.mesh_data[part_index]
+        if self.line_cache[part_index] is None:
+            count = mesh_data_part.get_stress_set_count()
+            cached_stresses = np.empty((count, 6), dtype=np.float64)
+            cached_stresses.fill(np.nan)
+            self.line_cache[part_index] = (mesh_data_part.get_stress_set_names(), cached_stresses,
+                                           np.empty(count, dtype=object))
+        set_names, cached_stresses, cached_lines = self.line_cache[part_index]
+        # Stress sets without cached line have NaN stresses, which never compare equal
+        changed = ~np.all(cached_stresses[rows] == stresses, axis=1)
+        changed_rows = rows[changed]
+        changed_stresses = stresses[changed]
+        instance_name = mesh_data_part.get_instance_name()
+        for start in np.arange(0, len(changed_rows), self.STRESS_CHUNK_SIZE):
+            end = min(start + self.STRESS_CHUNK_SIZE, len(changed_rows))
+            names = [instance_name + '.' + set_names[row] for row in changed_rows[start:end]]
+            text = format_stress_lines(line_format, names, changed_stresses[start:end])
+            cached_lines[changed_rows[start:end]] = text.splitlines(True)
+        cached_stresses[changed_rows] = changed_stresses
+        return cached_lines[rows]
+
     # Internal method called on initialization
-    def __on_init(self):
+    def __on_init(self, injections):
         # Fetch the job
         job = abaqus.mdb.jobs[self.default_job]
-        # Write the default input file
-        print('-> Writing default input file')
-        job.writeInput()
-        # Read the default input from the input file
-        self.default_input = read_lines_from_file(job.name + '.inp')
-        # Read the default input and inject the element sets
-        self.__inject_element_sets()
-        # Find the line at which to inject stress fields
-        self.__find_stress_injection_line()
-
-    # Internal method to inject element set definitions into an existing input file
+        # Write the default input file, unless the injections are restored from an existing one
+        if injections is None or not os.path.isfile(job.name + '.inp'):
+            print('-> Writing default input file')
+            job.writeInput()
+        # Index the keyword lines of the default input file
+        self.input_index = InputDeckIndex(job.name + '.inp')
+        # Restore the injections if they match the default input
+        if injections is not None:
+            if int(injections['input_size']) == self.input_index.size:
+                print('-> Restoring element set and stress field injection offsets')
+                self.heading_end = int(injections['heading_end'])
+                self.set_injections = [(int(offset), int(part_index))
+                                       for offset, part_index in injections['set_injections']]
+                self.stress_injection = int(injections['stress_injection'])
+                self.predefined = bool(injections['predefined'])
+                return
+            print('-> Default input file has changed, finding the injection offsets again')
+        # Find the end of the heading
+        self.heading_end = self.__find_heading_end()
+        # Find the offsets at which to inject the element sets
+        index = self.__inject_element_sets()
+        # Find the offset at which to inject stress fields
+        self.__find_stress_injection(index)
+
+    # Internal method to find the offsets at which to inject element set definitions into the default input, returns
+    # the index of the keyword line after the last injection
     def __inject_element_sets(self):
-        self.next_line = 0
-        sets_to_inject = np.arange(0, len(self.mesh_data))
-        current_part_index = -1
-        while True:
-            # fetch the current line
-            line = self.default_input[self.next_line]
-            # increment line index
-            self.next_line = self.next_line + 1
-            # check if the current mode is set injection or part scanning
+        self.set_injections = []
+        # Only inject sets for the parts which have data to inject
+        sets_to_inject = [part_index for part_index in np.arange(0, len(self.mesh_data))
+                          if self.mesh_data[part_index] is not None
+                          and self.mesh_data[part_index].get_stress_set_count() > 0]
+        index = 0
+        while len(sets_to_inject) > 0:
+            # find the next part definition
+            index = self.input_index.find('*Part, name=', index)
+            if index < 0:
+                print('-> No input file part definitions found for the remaining parts')
+                index = len(self.input_index)
+                break
+            current_part = self.input_index.get_line(index)[12:]
+            index = index + 1
+            print('-> Found input file part definition for ' + current_part)
+            # check if one of the parts to inject is the current part in the input file
+            current_part_index = -1
+            for set_index in np.arange(0, len(sets_to_inject)):
+                stress_set = self.mesh_data[sets_to_inject[set_index]].get_stress_sets()[0]
+                if stress_set.get_part_name() == current_part:
+                    # it is the current part in the input file, set as current part being injected
+                    current_part_index = sets_to_inject[set_index]
+                    print('--> Injecting sets for part ' + stress_set.get_part_name())
+                    # also remove it from the parts to inject list
+                    del sets_to_inject[set_index]
+                    break
             if current_part_index < 0:
-                # check if the line starts a part definition
-                if line[:12] == '*Part, name=':
-                    current_part = line[12:]
-                else:
-                    continue
-                # part definition reached, iterate over the remaining parts to inject
-                print('-> Found input file part definition for ' + current_part)
-                set_index = 0
-                while set_index < len(sets_to_inject):
-                    mesh_data_part = self.mesh_data[sets_to_inject[set_index]]
-                    if mesh_data_part is None or mesh_data_part.get_stress_set_count() <= 0:
-                        # this part has no data to inject, remove it from the parts to inject index list
-                        sets_to_inject = np.delete(sets_to_inject, set_index)
-                        continue
-                    # fetch a single stress set
-                    stress_set = mesh_data_part.get_stress_sets()[0]
-                    # this part has data to inject, check if it is the current part in the input file
-                    if stress_set.get_part_name() == current_part:
-                        # it is the current part in the input file, set as current part being injected
-                        current_part_index = sets_to_inject[set_index]
-                        print('--> Injecting sets for part ' + stress_set.get_part_name())
-                        # also remove it from the parts to inject index list
-                        sets_to_inject = np.delete(sets_to_inject, set_index)
-                        # increment the current line as it will be '*Node'
-                        self.next_line = self.next_line + 1
-                        break
-                    else:
-                        # this is a different part, leave it in the list and move to the next index
-                        set_index = set_index + 1
-                if current_part_index < 0:
-                    print('--> Skipping ' + current_part)
-            # current mode is set injection
-            else:
-                # if the line starts with a space, continue
-                if line[0] == ' ':
-                    continue
-                # if the line starts with an asterisk, a new section is found
-                if line[0] == '*':
-                    # the next section is an element definition section
-                    if line[:15] == '*Element, type=':
-                        continue
-                    # set injection point has been reached
-                    else:
-                        # Inject the element sets
-                        print('--> Element set injection starts at line: ' + str(self.next_line))
-                        mesh_data_part = self.mesh_data[current_part_index]
-                        # Decrement next line once
-                        self.next_line = self.next_line - 1
-                        # Do the actual injection
-                        for stress_set in mesh_data_part.get_stress_sets():
-                            # Insert element set definition
-                            self.default_input[self.next_line:self.next_line] = [
-                                '*Elset, elset=' + stress_set.get_set_name()
-                            ]
-                            self.next_line = self.next_line + 1
-                            # Fetch the elements
-                            elements = stress_set.get_elements()
-                            # Write the elements
-                            line = ''
-                            element_counter = 0
-                            element_limit = 8
-                            for i in np.arange(0, len(elements)):
-                                # Fetch next element
-                                element = elements[i]
-                                # Add the element to the line
-                                line = line + str(element.get_label()) + ','
-                                element_counter = element_counter + 1
-                                if element_counter == element_limit or i >= (len(elements) - 1):
-                                    # Write the line
-                                    self.default_input[self.next_line:self.next_line] = [line]
-                                    self.next_line = self.next_line + 1
-                                    # Reset the line and counter
-                                    line = ''
-                                    element_counter = 0
-                                else:
-                                    line = line + ' '
-                        # Reset the current part index
-                        current_part_index = -1
-                        # Re-increment the next line
-                        self.next_line = self.next_line + 1
-                # if the line does not start with a space or asterisk, it is element definition and to be skipped
-                else:
-                    continue
-            # check if set injection is complete
-            if len(sets_to_inject) <= 0:
-                # only break from the while loop if the last part is actually injected
-                if current_part_index < 0:
+                print('--> Skipping ' + current_part)
+                continue
+            # skip the node and element definitions, the sets are injected at the next keyword
+            while index < len(self.input_index):
+                line = self.input_index.get_line(index)
+                if line[:5] != '*Node' and line[:15] != '*Element, type=':
                     break
+                index = index + 1
+            # Store the offset at which the element sets are to be injected
+            offset = self.input_index.get_offset(index)
+            print('--> Element set injection starts at byte ' + str(offset))
+            self.set_injections.append((offset, current_part_index))
+        return index
 
-    # Internal method to find the line at which to inject stresses
-    def __find_stress_injection_line(self):
-        bc_section_index = -1
+    # Internal method to find the offset at which to inject stresses, starting from an index in the keyword lines. The
+    # stresses are initial conditions, which must be defined in the model data before the first step
+    def __find_stress_injection(self, index):
+        # Only boundary conditions in the model data, before the first step, are considered, as the boundary
+        # conditions of later steps are history data
+        step_index = self.input_index.find('*Step', index)
+        index = self.input_index.find('** BOUNDARY CONDITIONS', index)
+        if step_index >= 0 and index > step_index:
+            index = -1
         inject_index = -1
-        while True:
-            # fetch the current line
-            line = self.default_input[self.next_line]
-            # Increment the line index
-            self.next_line = self.next_line + 1
-            # If the BC section has not yet been found, check for it
-            if bc_section_index < 0:
-                if line == '** BOUNDARY CONDITIONS':
-                    bc_section_index = self.next_line - 1
-            # If the BC section has been found, find where it ends
-            else:
+        if index >= 0:
+            for index in np.arange(index + 1, len(self.input_index)):
+                line = self.input_index.get_line(index)
                 if line == '** PREDEFINED FIELDS':
                     self.predefined = True
                     continue
-                if line[0:4] == '** -':
-                    inject_index = self.next_line - 1
+                if line[0:4] == '** -' or line[0:5] == '*Step':
+                    inject_index = index
+                    break
+        if inject_index < 0:
+            # Without a boundary conditions section in the model data, inject the stresses before the first step
+            inject_index = step_index
+            if inject_index < 0:
+                raise ValueError('No step found in "' + self.input_index.file_name +
+                                 '", the stress fields can not be injected before the first step')
+            # Keep the comments introducing the step with the step, from its separator line onwards
+            index = inject_index - 1
+            while index >= 0 and self.input_index.get_line(index)[0:2] == '**':
+                if self.input_index.get_line(index)[0:4] == '** -':
+                    inject_index = index
                     break
-        print('--> Stress field injection starts at line: ' + str(inject_index + 1))
-        self.next_line = inject_index
+                index = index - 1
+            print('--> Boundary conditions section not found in the model data, injecting stress fields before the first step')
+        self.stress_injection = self.input_index.get_offset(inject_index)
+        print('--> Stress field injection starts at byte ' + str(self.stress_injection))
+
+
+# utility method to split the element labels of stress sets in ranges with a constant stride of at least a minimum
+# length, and the remaining labels. The labels of stress set k are labels[member_offsets[k]:member_offsets[k + 1]], from
+# each label the longest range is taken. Returns the ranges as (first, last, stride) rows and the sorted remaining labels,
+# both in the same compressed format as the labels: range_offsets, ranges, label_offsets, labels
+def find_set_label_ranges(labels, member_offsets, min_length=3):
+    labels = np.asarray(labels, dtype=np.int64)
+    member_offsets = np.asarray(member_offsets, dtype=np.int64)
+    set_count = len(member_offsets) - 1
+    set_ids = np.repeat(np.arange(0, set_count, dtype=np.int64), np.diff(member_offsets))
+    # Sort the labels within each stress set and remove duplicates
+    order = np.lexsort((labels, set_ids))
+    labels = labels[order]
+    set_ids = set_ids[order]
+    if len(labels) > 0:
+        unique = np.concatenate(([True], (labels[1:] != labels[:-1]) | (set_ids[1:] != set_ids[:-1])))
+        labels = labels[unique]
+        set_ids = set_ids[unique]
+    # Find the runs of consecutive strides which are equal, within the same stress set
+    strides = np.diff(labels)
+    valid = set_ids[1:] == set_ids[:-1]
+    same = valid[1:] & valid[:-1] & (strides[1:] == strides[:-1])
+    run_starts = np.nonzero(valid & ~np.concatenate(([False], same)))[0]
+    run_ends = np.nonzero(valid & ~np.concatenate((same, [False])))[0]
+    run_lengths = run_ends - run_starts + 1
+    # A range takes the first label of the next run if it is adjacent, so that a run which only just has the minimum
+    # length is too short if the previous run is taken, this is resolved in order
+    taken = run_lengths >= min_length
+    adjacent = np.concatenate(([False], run_ends[:-1] + 1 == run_starts[1:]))
+    for run in np.nonzero(run_lengths == min_length - 1)[0]:
+        taken[run] = not (adjacent[run] and taken[run - 1])
+    consumed = adjacent & np.concatenate(([False], taken[:-1]))
+    firsts = (run_starts + consumed)[taken]
+    lasts = run_ends[taken] + 1
+    ranges = np.column_stack((labels[firsts], labels[lasts], strides[run_starts[taken]])).reshape((-1, 3))
+    # The labels which are not in a range remain
+    marks = np.zeros(len(labels) + 1, dtype=np.int64)
+    marks[firsts] += 1
+    marks[lasts + 1] -= 1
+    remaining = np.cumsum(marks[:-1]) <= 0
+    # Count the ranges and remaining labels of each stress set
+    range_offsets = np.concatenate(([0], np.cumsum(np.bincount(set_ids[firsts], minlength=set_count))))
+    label_offsets = np.concatenate(([0], np.cumsum(np.bincount(set_ids[remaining], minlength=set_count))))
+    return range_offsets.astype(np.int64), ranges, label_offsets.astype(np.int64), labels[remaining]
+
+
+# utility method to format the stress definition lines for the given set names and stresses, with a line format for a
+# name and six stress components
+def format_stress_lines(line_format, names, stresses):
+    values = np.empty((len(names), 7), dtype=object)
+    values[:, 0] = names
+    values[:, 1:] = stresses
+    return (line_format*len(names)) % tuple(values.ravel())
+
+
+# utility method to read the stresses at the centre of the elements in the last frame of an odb,
+# returns the element labels and stresses per instance
+def read_centroid_stresses(odb):
+    # Fetch general stress field output at the centre of the elements
+    step = odb.steps[odb.steps.keys()[len(odb.steps.keys()) - 1]]
+    frame = step.frames[len(step.frames) - 1]
+    stress_output = frame.fieldOutputs['S'].getSubset(position=CENTROID)
+    labels = {}
+    values = {}
+    try:
+        # Read the stresses in bulk, each block holds the output of a single element type with its own components
+        for block in stress_output.bulkDataBlocks:
+            instance_name = block.instance.name
+            labels.setdefault(instance_name, []).append(np.asarray(block.elementLabels, dtype=np.int64))
+            values.setdefault(instance_name, []).append(map_stress_components(block.data, block.componentLabels))
+    except AttributeError:
+        # If bulk data is not available, read the values one by one
+        labels = {}
+        values = {}
+        component_labels = stress_output.componentLabels
+        for value in stress_output.values:
+            instance_name = value.instance.name
+            labels.setdefault(instance_name, []).append(np.array([value.elementLabel], dtype=np.int64))
+            values.setdefault(instance_name, []).append(map_stress_components([value.data], component_labels))
+    # Combine the stresses for each instance
+    stresses = {}
+    for instance_name in labels.keys():
+        stresses[instance_name] = (np.concatenate(labels[instance_name]), np.concatenate(values[instance_name]))
+    return stresses
+
+
+# utility method to arrange stress output with the given component labels (e.g. S11, S22 and S12 for plane stress
+# elements) as an array of shape (N, 6) with the components S11, S22, S33, S12, S13 and S23, components which are not
+# present are zero
+def map_stress_components(data, component_labels):
+    data = np.asarray(data, dtype=np.float64)
+    stresses = np.zeros((len(data), len(STRESS_COMPONENTS)), dtype=np.float64)
+    for column in np.arange(0, min(data.shape[1], len(component_labels))):
+        label = str(component_labels[column])
+        if label in STRESS_COMPONENTS:
+            stresses[:, STRESS_COMPONENTS.index(label)] = data[:, column]
+    return stresses
 
 
-# utility method to read lines from file
-def read_lines_from_file(file_name):
-    # read the file contents
-    fid = open(file_name, 'r')
-    raw = fid.read().strip()
-    fid.close()
-    return raw.split('\n')
+# utility method to compute the deviation between two arrays of stresses of shape (N, 6) for each row
+def compute_deviations(old_stresses, new_stresses):
+    return np.sqrt(np.sum((old_stresses - new_stresses)**2, axis=1))/6
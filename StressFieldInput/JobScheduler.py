@@ -0,0 +1,71 @@
+# coding=utf-8
+
+from abaqusConstants import *
+import os
+import time
+
+
+# Class to run jobs concurrently, limiting the number of jobs running at the same time
+class JobScheduler:
+    def __init__(self, max_parallel=1, cores_per_job=1):
+        # Define fields
+        self.max_parallel = max(1, max_parallel)
+        self.cores_per_job = max(1, cores_per_job)
+        self.queue = []
+        self.running = []
+        self.finished = []
+        self.submit_times = {}
+        self.run_times = {}
+
+    # Adds a job to the queue
+    def add_job(self, job):
+        self.queue.append(job)
+
+    # Runs all queued jobs, calls on_complete with each job as it finishes and returns the jobs in order of completion.
+    # The jobs are collected in the order in which they were submitted, the time from the submission of each job until
+    # it was collected is stored in run_times
+    def run(self, on_complete=None):
+        while len(self.queue) > 0 or len(self.running) > 0:
+            # Submit jobs while there are free slots
+            while len(self.queue) > 0 and len(self.running) < self.max_parallel:
+                self.__submit(self.queue.pop(0))
+            # Collect the finished jobs
+            for job in self.__wait_for_finished():
+                self.running.remove(job)
+                self.finished.append(job)
+                self.run_times[job.name] = time.time() - self.submit_times[job.name]
+                print('--> Job ' + job.name + ' finished (' + str(len(self.finished)) + ' finished, ' +
+                      str(len(self.running)) + ' running, ' + str(len(self.queue)) + ' queued)')
+                if on_complete is not None:
+                    on_complete(job)
+        return self.finished
+
+    # Internal method to configure and submit a job
+    def __submit(self, job):
+        if self.cores_per_job > 1:
+            job.setValues(numCpus=self.cores_per_job, numDomains=self.cores_per_job)
+        print('--> Submitting job ' + job.name)
+        self.submit_times[job.name] = time.time()
+        job.submit()
+        self.running.append(job)
+
+    # Internal method to wait until the oldest running job has finished, returns the finished jobs. The job states are
+    # not polled, as they are only updated by the message system of Abaqus CAE, which does not run while a script waits
+    def __wait_for_finished(self):
+        job = self.running[0]
+        job.waitForCompletion()
+        return [job]
+
+
+# Utility method to check if a job has completed successfully. If the message system of Abaqus CAE is not active, the
+# job state is not known and the status file of the job is checked instead
+def job_completed(job):
+    if job.status is not None:
+        return job.status == COMPLETED
+    status_file_name = job.name + '.sta'
+    if not os.path.isfile(status_file_name):
+        return False
+    status_file = open(status_file_name, 'r')
+    status = status_file.read()
+    status_file.close()
+    return 'HAS COMPLETED SUCCESSFULLY' in status
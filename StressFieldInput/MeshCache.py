@@ -0,0 +1,67 @@
+# coding=utf-8
+
+import hashlib
+import os
+import numpy as np
+from MeshData import mesh_data_from_arrays
+from MeshData import mesh_data_to_arrays
+
+
+# Class to store the characterized mesh in a file, so that it can be reused by later runs as long as the mesh and the
+# categorization do not change. The cached mesh is identified by a fingerprint of the instance meshes and the script
+class MeshCache:
+    def __init__(self, default_job):
+        # Define fields
+        self.file_name = default_job + '_Stress_Input_Mesh.npz'
+
+    # Reads the mesh data from the cache, returns None if there is no cached mesh data with the given fingerprint
+    def load(self, fingerprint):
+        if not os.path.isfile(self.file_name):
+            return None
+        try:
+            data = np.load(self.file_name)
+            arrays = {}
+            for key in data.files:
+                arrays[key] = data[key]
+            data.close()
+        except Exception:
+            # An unreadable cache is treated as missing
+            return None
+        if str(arrays['fingerprint']) != fingerprint:
+            return None
+        return mesh_data_from_arrays(arrays)
+
+    # Writes the mesh data to the cache together with its fingerprint
+    def save(self, fingerprint, mesh_data):
+        arrays = mesh_data_to_arrays(mesh_data)
+        arrays['fingerprint'] = np.array(fingerprint)
+        np.savez_compressed(self.file_name, **arrays)
+
+
+# Utility method to compute the fingerprint of the meshes of the instances in an assembly and the stress script used to
+# categorize the elements, pass None as script file if the elements are not categorized. The node coordinates of the
+# instances are passed as a list of arrays in the order of the instance keys, so that they are only fetched once
+def compute_mesh_fingerprint(instances, node_coordinates, script_file):
+    sha = hashlib.sha1()
+    for instance_index in np.arange(0, len(instances.keys())):
+        instance_key = instances.keys()[instance_index]
+        instance = instances[instance_key]
+        coordinates = node_coordinates[instance_index]
+        sha.update(str((instance_key, instance.part.name, len(coordinates), len(instance.elements))).encode('utf-8'))
+        sha.update(to_bytes(np.ascontiguousarray(coordinates)))
+    if script_file is None:
+        sha.update(b'uncategorized')
+    else:
+        script = open(script_file, 'rb')
+        sha.update(script.read())
+        script.close()
+    return sha.hexdigest()
+
+
+# Utility method to fetch the raw bytes of an array, tostring was renamed to tobytes and removed in later versions of
+# numpy, while the version bundled with older versions of Abaqus only has tostring
+def to_bytes(array):
+    to_bytes_method = getattr(array, 'tobytes', None)
+    if to_bytes_method is None:
+        to_bytes_method = array.tostring
+    return to_bytes_method()
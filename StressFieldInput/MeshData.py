@@ -11,6 +11,9 @@ class MeshData:
     def add_element(self, element, category=None):
         pass
 
+    def add_elements(self, instance, part, labels, centroids, categories=None):
+        pass
+
     def define_stresses(self):
         pass
 
@@ -20,6 +23,64 @@ class MeshData:
     def get_stress_sets(self):
         pass
 
+    # Fetches the name of the instance the stress sets belong to
+    def get_instance_name(self):
+        return self.get_stress_sets()[0].get_instance_name()
+
+    # Fetches the label of the element holding the stress of each stress set as an array
+    def get_stress_set_labels(self):
+        stress_sets = self.get_stress_sets()
+        labels = np.zeros(len(stress_sets), dtype=np.int64)
+        for index in np.arange(0, len(stress_sets)):
+            labels[index] = stress_sets[index].get_label()
+        return labels
+
+    # Fetches the centre coordinates of all stress sets as an array of shape (N, 3)
+    def get_stress_set_centroids(self):
+        stress_sets = self.get_stress_sets()
+        centroids = np.zeros((len(stress_sets), 3), dtype=np.float64)
+        for index in np.arange(0, len(stress_sets)):
+            stress_set = stress_sets[index]
+            centroids[index] = [stress_set.get_x(), stress_set.get_y(), stress_set.get_z()]
+        return centroids
+
+    # Fetches the element set names of all stress sets
+    def get_stress_set_names(self):
+        return [stress_set.get_set_name() for stress_set in self.get_stress_sets()]
+
+    # Fetches the stresses of all stress sets as an array of shape (N, 6), undefined stresses are NaN
+    def get_stress_set_stresses(self):
+        stress_sets = self.get_stress_sets()
+        stresses = np.empty((len(stress_sets), 6), dtype=np.float64)
+        stresses.fill(np.nan)
+        for index in np.arange(0, len(stress_sets)):
+            stress = stress_sets[index].get_stress()
+            if stress is not None:
+                stresses[index] = stress
+        return stresses
+
+    # Defines the stresses of all stress sets from an array of shape (N, 6), rows which are not defined are ignored
+    def define_stress_set_stresses(self, stresses, defined):
+        stress_sets = self.get_stress_sets()
+        for index in np.arange(0, len(stress_sets)):
+            if defined[index]:
+                stress_sets[index].define_stress(stresses[index].tolist())
+            else:
+                stress_sets[index].define_stress(None)
+
+    # Fetches the data as a dictionary of arrays, from which it can be restored with from_arrays()
+    def to_arrays(self):
+        pass
+
+    # Fetches the column-wise element data
+    def get_element_data(self):
+        pass
+
+    # Fetches the element indices of the members of all stress sets, the element indices of the members of stress set
+    # k are member_indices[member_offsets[k]:member_offsets[k + 1]], returns member_offsets and member_indices
+    def get_stress_set_members(self):
+        pass
+
     @staticmethod
     def create_mesh_data(elements, categorize):
         if categorize:
@@ -27,90 +88,494 @@ class MeshData:
         else:
             return MeshDataByElement(elements)
 
+    # Restores mesh data from a dictionary of arrays, returns None if there are no arrays
+    @staticmethod
+    def from_arrays(arrays):
+        if len(arrays) <= 0:
+            return None
+        if 'category_names' in arrays:
+            return MeshDataCategorized.from_arrays(arrays)
+        else:
+            return MeshDataByElement.from_arrays(arrays)
 
+
+# Mesh data storing the element data column-wise in contiguous arrays, one stress set per element
 class MeshDataByElement(MeshData):
     def __init__(self, element_count):
         MeshData.__init__(self, element_count)
-        self.elements = np.empty(self.element_count, dtype=object)
+        # Instance and part names, referenced by the instance ids of the elements
+        self.instance_names = []
+        self.part_names = []
+        # Element data columns, indexed by element label - 1
+        self.instance_ids = np.zeros(self.element_count, dtype=np.int32)
+        self.labels = np.zeros(self.element_count, dtype=np.int64)
+        self.centroids = np.zeros((self.element_count, 3), dtype=np.float64)
+        self.stresses = np.zeros((self.element_count, 6), dtype=np.float64)
+        self.stress_defined = np.ones(self.element_count, dtype=bool)
 
     def add_element(self, element, category=None):
         # element labels start at 1, indices start at 0
         index = element.get_label() - 1
-        self.elements[index] = element
+        self.instance_ids[index] = self.get_instance_id(element.get_instance_name(), element.get_part_name())
+        self.labels[index] = element.get_label()
+        self.centroids[index] = [element.get_x(), element.get_y(), element.get_z()]
+        self.define_stress(index, element.get_stress())
+
+    # Adds all elements of an instance at once from arrays of labels and centre coordinates
+    def add_elements(self, instance, part, labels, centroids, categories=None):
+        # element labels start at 1, indices start at 0
+        indices = np.asarray(labels) - 1
+        self.instance_ids[indices] = self.get_instance_id(instance, part)
+        self.labels[indices] = labels
+        self.centroids[indices] = centroids
+
+    # Fetches the id of an instance, registering it if necessary
+    def get_instance_id(self, instance, part):
+        if instance not in self.instance_names:
+            self.instance_names.append(instance)
+            self.part_names.append(part)
+        return self.instance_names.index(instance)
 
     def get_stress_set_count(self):
-        return len(self.elements)
+        return self.element_count
 
     def get_stress_sets(self):
-        return self.elements
+        return StressSetViews(self, MeshElementView)
+
+    def get_labels(self):
+        return self.labels
+
+    def get_centroids(self):
+        return self.centroids
+
+    def get_stresses(self):
+        return self.stresses
+
+    def get_stress_defined(self):
+        return self.stress_defined
+
+    def get_instance_name(self):
+        return self.instance_names[self.instance_ids[0]]
+
+    def get_stress_set_labels(self):
+        return self.labels
+
+    def get_stress_set_centroids(self):
+        return self.centroids
+
+    def get_stress_set_names(self):
+        return ['stress_field_el_' + str(label) for label in self.labels.tolist()]
+
+    def get_stress_set_stresses(self):
+        stresses = self.stresses.copy()
+        stresses[~self.stress_defined] = np.nan
+        return stresses
+
+    def define_stress_set_stresses(self, stresses, defined):
+        defined = np.asarray(defined, dtype=bool)
+        self.stresses[defined] = np.asarray(stresses)[defined]
+        self.stress_defined[:] = defined
+
+    # Defines the stress for the element at the given index, None marks the stress as undefined
+    def define_stress(self, index, stress):
+        if stress is None:
+            self.stress_defined[index] = False
+        else:
+            self.stresses[index] = stress
+            self.stress_defined[index] = True
+
+    # Fetches the stress for the element at the given index, or None if it is undefined
+    def get_stress(self, index):
+        if self.stress_defined[index]:
+            return self.stresses[index].tolist()
+        return None
+
+    def get_element_data(self):
+        return self
+
+    def get_stress_set_members(self):
+        indices = np.arange(0, self.element_count, dtype=np.int64)
+        return np.arange(0, self.element_count + 1, dtype=np.int64), indices
+
+    def to_arrays(self):
+        return {
+            'instance_names': np.array(self.instance_names, dtype=str),
+            'part_names': np.array(self.part_names, dtype=str),
+            'instance_ids': self.instance_ids,
+            'labels': self.labels,
+            'centroids': self.centroids,
+            'stresses': self.stresses,
+            'stress_defined': self.stress_defined,
+        }
+
+    @staticmethod
+    def from_arrays(arrays):
+        mesh_data = MeshDataByElement(0)
+        mesh_data.element_count = len(arrays['labels'])
+        mesh_data.instance_names = [str(name) for name in arrays['instance_names']]
+        mesh_data.part_names = [str(name) for name in arrays['part_names']]
+        mesh_data.instance_ids = arrays['instance_ids']
+        mesh_data.labels = arrays['labels']
+        mesh_data.centroids = arrays['centroids']
+        mesh_data.stresses = arrays['stresses']
+        mesh_data.stress_defined = arrays['stress_defined']
+        return mesh_data
+
+
+# Lightweight sequence of views on the stress sets of mesh data, views are only created when accessed
+class StressSetViews:
+    def __init__(self, mesh_data, view_class):
+        self.mesh_data = mesh_data
+        self.view_class = view_class
+
+    def __len__(self):
+        return self.mesh_data.get_stress_set_count()
+
+    def __getitem__(self, index):
+        if index < 0:
+            index = index + len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('Stress set index out of range')
+        return self.view_class(self.mesh_data, index)
+
+    def __iter__(self):
+        for index in np.arange(0, len(self)):
+            yield self.view_class(self.mesh_data, index)
+
+
+# View on a single element of a MeshDataByElement, implementing the stress set definition interface
+class MeshElementView(StressSetDefinition):
+    def __init__(self, mesh_data, index):
+        StressSetDefinition.__init__(self)
+        self.mesh_data = mesh_data
+        self.index = index
+
+    def get_label(self):
+        return int(self.mesh_data.labels[self.index])
+
+    def get_part_name(self):
+        return self.mesh_data.part_names[self.mesh_data.instance_ids[self.index]]
+
+    def get_instance_name(self):
+        return self.mesh_data.instance_names[self.mesh_data.instance_ids[self.index]]
+
+    def get_elements(self):
+        return [self]
+
+    def get_element_labels(self):
+        return self.mesh_data.labels[self.index:self.index + 1]
+
+    def get_x(self):
+        return self.mesh_data.centroids[self.index, 0]
+
+    def get_y(self):
+        return self.mesh_data.centroids[self.index, 1]
+
+    def get_z(self):
+        return self.mesh_data.centroids[self.index, 2]
+
+    def get_set_name(self):
+        return 'stress_field_el_' + str(self.get_label())
+
+    def define_stress(self, stress):
+        self.mesh_data.define_stress(self.index, stress)
+
+    def get_stress(self):
+        return self.mesh_data.get_stress(self.index)
 
 
+# Mesh data grouping the elements in categories, one stress set per category
 class MeshDataCategorized(MeshData):
     def __init__(self, element_count):
         MeshData.__init__(self, element_count)
-        self.categories = np.empty(self.element_count, dtype=object)
+        # Element data is stored column-wise, categories refer to the elements by their index
+        self.elements = MeshDataByElement(self.element_count)
+        self.category_names = []
         self.category_indices_by_name = {}
+        # Category membership in compressed sparse row format, the element indices of the members of category k are
+        # member_indices[member_offsets[k]:member_offsets[k + 1]]
+        self.member_offsets = np.zeros(1, dtype=np.int64)
+        self.member_indices = np.zeros(0, dtype=np.int64)
+        # Element and category index of every categorized element, in the order in which they were added
+        self.element_column = np.zeros(0, dtype=np.int64)
+        self.category_column = np.zeros(0, dtype=np.int64)
+        # Elements added one by one, pending to be appended to the columns
+        self.pending_elements = []
+        self.pending_categories = []
+        self.compressed = True
 
     def add_element(self, element, category=None):
         # Ignore the element if the category is None
         if category is None:
             return
-        # Add the category if necessary and fetch the category index
-        category = str(category)
-        if category in self.category_indices_by_name.keys():
-            index = self.category_indices_by_name[category]
-            self.categories[index].add_element(element)
+        # Store the element data
+        self.elements.add_element(element)
+        # Fetch the category index, and store the element in the category
+        self.pending_elements.append(element.get_label() - 1)
+        self.pending_categories.append(self.get_category_index(str(category)))
+        self.compressed = False
+
+    # Adds all elements of an instance at once and groups them by their category ids
+    def add_elements(self, instance, part, labels, centroids, categories=None):
+        # Store the element data
+        self.elements.add_elements(instance, part, labels, centroids)
+        element_indices = np.asarray(labels) - 1
+        # Ignore the elements without category
+        categories = np.asarray(categories)
+        if categories.dtype == object:
+            categorized = np.array([category is not None for category in categories], dtype=bool)
+        elif categories.dtype.kind == 'f':
+            categorized = ~np.isnan(categories)
         else:
-            index = len(self.category_indices_by_name)
-            self.category_indices_by_name[category] = index
-            self.categories[index] = Category(category, element, self.element_count)
+            categorized = np.ones(len(categories), dtype=bool)
+        element_indices = element_indices[categorized]
+        categories = categories[categorized]
+        if len(categories) <= 0:
+            return
+        if categories.dtype == object:
+            categories = np.array([str(category) for category in categories])
+        elif categories.dtype.kind == 'f' and np.all(np.mod(categories, 1) == 0):
+            # Integer ids are often returned as floats to mark the elements without category with NaN, name them as
+            # integers, as they are named when they are returned by get_category
+            categories = categories.astype(np.int64)
+        # Find the unique categories, and fetch their indices in order of first occurrence
+        unique_categories, first_indices, inverse = np.unique(categories, return_index=True, return_inverse=True)
+        unique_indices = np.zeros(len(unique_categories), dtype=np.int64)
+        for index in np.argsort(first_indices, kind='mergesort'):
+            unique_indices[index] = self.get_category_index(category_name(unique_categories[index]))
+        # Append the elements to the columns
+        self.append_pending()
+        self.element_column = np.concatenate((self.element_column, element_indices))
+        self.category_column = np.concatenate((self.category_column, unique_indices[inverse]))
+        self.compressed = False
+
+    # Fetches the index of a category by its name, registering it if necessary
+    def get_category_index(self, name):
+        index = self.category_indices_by_name.get(name)
+        if index is None:
+            index = len(self.category_names)
+            self.category_indices_by_name[name] = index
+            self.category_names.append(name)
+        return index
+
+    # Appends the elements which were added one by one to the columns
+    def append_pending(self):
+        if len(self.pending_elements) > 0:
+            self.element_column = np.concatenate(
+                (self.element_column, np.array(self.pending_elements, dtype=np.int64)))
+            self.category_column = np.concatenate(
+                (self.category_column, np.array(self.pending_categories, dtype=np.int64)))
+            self.pending_elements = []
+            self.pending_categories = []
+
+    # Groups the elements by category, keeping the order in which they were added within each category
+    def compress(self):
+        if self.compressed:
+            return
+        self.append_pending()
+        order = np.argsort(self.category_column, kind='mergesort')
+        self.member_indices = self.element_column[order]
+        counts = np.bincount(self.category_column, minlength=len(self.category_names))
+        self.member_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.compressed = True
+
+    # Fetches the element indices of the members of a category
+    def get_members(self, index):
+        self.compress()
+        return self.member_indices[self.member_offsets[index]:self.member_offsets[index + 1]]
+
+    # Fetches the element indices of the first member of every category, which hold the stresses of the categories
+    def get_first_members(self):
+        self.compress()
+        return self.member_indices[self.member_offsets[0:-1]]
 
     def get_stress_set_count(self):
-        return len(self.category_indices_by_name)
+        return len(self.category_names)
 
     def get_stress_sets(self):
-        return self.categories[0:len(self.category_indices_by_name)]
+        self.compress()
+        return StressSetViews(self, Category)
+
+    def get_instance_name(self):
+        return self.elements.get_instance_name()
+
+    def get_stress_set_labels(self):
+        return self.elements.labels[self.get_first_members()]
+
+    def get_stress_set_centroids(self):
+        return self.elements.centroids[self.get_first_members()]
+
+    def get_stress_set_names(self):
+        return ['stress_field_group_' + name for name in self.category_names]
 
+    def get_stress_set_stresses(self):
+        first_members = self.get_first_members()
+        stresses = self.elements.stresses[first_members]
+        stresses[~self.elements.stress_defined[first_members]] = np.nan
+        return stresses
+
+    def define_stress_set_stresses(self, stresses, defined):
+        first_members = self.get_first_members()
+        defined = np.asarray(defined, dtype=bool)
+        self.elements.stresses[first_members[defined]] = np.asarray(stresses)[defined]
+        self.elements.stress_defined[first_members] = defined
+
+    def get_element_data(self):
+        return self.elements
 
+    def get_stress_set_members(self):
+        self.compress()
+        return self.member_offsets, self.member_indices
+
+    def to_arrays(self):
+        self.append_pending()
+        arrays = {
+            'category_names': np.array(self.category_names, dtype=str),
+            'element_column': self.element_column,
+            'category_column': self.category_column,
+        }
+        element_arrays = self.elements.to_arrays()
+        for key in element_arrays.keys():
+            arrays['elements_' + key] = element_arrays[key]
+        return arrays
+
+    @staticmethod
+    def from_arrays(arrays):
+        mesh_data = MeshDataCategorized(0)
+        element_arrays = {}
+        for key in arrays.keys():
+            if key.startswith('elements_'):
+                element_arrays[key[9:]] = arrays[key]
+        mesh_data.elements = MeshDataByElement.from_arrays(element_arrays)
+        mesh_data.element_count = mesh_data.elements.element_count
+        for name in arrays['category_names']:
+            mesh_data.get_category_index(str(name))
+        mesh_data.element_column = arrays['element_column']
+        mesh_data.category_column = arrays['category_column']
+        mesh_data.compressed = False
+        return mesh_data
+
+
+# View on a category of elements sharing a stress state, the stress is defined on the first element of the category
 class Category(StressSetDefinition):
-    def __init__(self, name, element, element_count):
+    def __init__(self, mesh_data, index):
         StressSetDefinition.__init__(self)
-        self.name = name
-        self.elements = np.empty(element_count, dtype=object)
-        # There will always be an element at index 0, so it is safe to fetch it in other methods
-        self.elements[0] = element
-        self.next_index = 1
+        self.mesh_data = mesh_data
+        self.index = index
 
     def get_name(self):
-        return self.name
-
-    def add_element(self, element):
-        self.elements[self.next_index] = element
-        self.next_index = self.next_index + 1
+        return self.mesh_data.category_names[self.index]
 
     def get_part_name(self):
-        return self.elements[0].get_part_name()
+        return self.get_first_element().get_part_name()
 
     def get_instance_name(self):
-        return self.elements[0].get_instance_name()
+        return self.get_first_element().get_instance_name()
 
     def get_elements(self):
-        return self.elements[0:self.next_index]
+        return [MeshElementView(self.mesh_data.elements, index) for index in self.mesh_data.get_members(self.index)]
+
+    def get_element_labels(self):
+        return self.mesh_data.elements.labels[self.mesh_data.get_members(self.index)]
+
+    def get_first_element(self):
+        return MeshElementView(self.mesh_data.elements, self.mesh_data.get_members(self.index)[0])
+
+    def get_label(self):
+        return self.get_first_element().get_label()
 
     def get_x(self):
-        return self.elements[0].get_x()
+        return self.get_first_element().get_x()
 
     def get_y(self):
-        return self.elements[0].get_y()
+        return self.get_first_element().get_y()
 
     def get_z(self):
-        return self.elements[0].get_z()
+        return self.get_first_element().get_z()
 
     def get_set_name(self):
         return 'stress_field_group_' + self.get_name()
 
     def define_stress(self, stress):
-        self.elements[0].define_stress(stress)
+        self.get_first_element().define_stress(stress)
 
     def get_stress(self):
-        return self.elements[0].get_stress()
+        return self.get_first_element().get_stress()
+
+
+# Utility method to merge the stress sets of an instance with equal stresses, stresses are equal if they are identical
+# or, with a tolerance larger than 0, if they are equal after rounding to a multiple of the tolerance. Returns mesh data
+# with a category for each group of stress sets, the stress of each category is the stress of its first stress set
+def merge_stress_sets(mesh_data_part, tolerance=0.0):
+    stresses = mesh_data_part.get_stress_set_stresses()
+    # Stress sets without stress are left out
+    defined = np.all(np.isfinite(stresses), axis=1)
+    keys = stresses[defined]
+    if tolerance > 0:
+        keys = np.round(keys/tolerance)
+    set_groups = -np.ones(len(stresses), dtype=np.int64)
+    set_groups[defined] = group_rows(keys)
+    # Assign the members of every stress set to the group of the stress set
+    member_offsets, member_indices = mesh_data_part.get_stress_set_members()
+    member_groups = np.repeat(set_groups, np.diff(member_offsets))
+    merged = MeshDataCategorized(mesh_data_part.element_count)
+    merged.elements = mesh_data_part.get_element_data()
+    group_count = 0
+    if len(keys) > 0:
+        group_count = np.max(set_groups) + 1
+    for group in np.arange(0, group_count):
+        merged.get_category_index('merged_' + str(group))
+    merged.element_column = member_indices[member_groups >= 0]
+    merged.category_column = member_groups[member_groups >= 0]
+    merged.compressed = False
+    return merged
+
+
+# Utility method to group identical rows of an array, returns the group index of every row, with the groups numbered
+# in order of their first row
+def group_rows(rows):
+    if len(rows) <= 0:
+        return np.zeros(0, dtype=np.int64)
+    # Sort the rows, identical rows end up next to each other with their original order kept
+    order = np.lexsort(rows.T[::-1])
+    sorted_rows = rows[order]
+    new_group = np.concatenate(([True], np.any(sorted_rows[1:] != sorted_rows[:-1], axis=1)))
+    groups = np.empty(len(rows), dtype=np.int64)
+    groups[order] = np.cumsum(new_group) - 1
+    # Renumber the groups in order of their first row
+    numbers = np.empty(np.count_nonzero(new_group), dtype=np.int64)
+    numbers[np.argsort(order[new_group], kind='mergesort')] = np.arange(0, len(numbers))
+    return numbers[groups]
+
+
+# Utility method to store the mesh data of all instances in a single dictionary of arrays
+def mesh_data_to_arrays(mesh_data):
+    arrays = {'mesh_count': np.array(len(mesh_data))}
+    for part_index in np.arange(0, len(mesh_data)):
+        if mesh_data[part_index] is None:
+            continue
+        part_arrays = mesh_data[part_index].to_arrays()
+        for key in part_arrays.keys():
+            arrays['mesh_' + str(part_index) + '_' + key] = part_arrays[key]
+    return arrays
+
+
+# Utility method to restore the mesh data of all instances from a dictionary of arrays
+def mesh_data_from_arrays(arrays):
+    mesh_data = np.empty(int(arrays['mesh_count']), dtype=object)
+    for part_index in np.arange(0, len(mesh_data)):
+        prefix = 'mesh_' + str(part_index) + '_'
+        part_arrays = {}
+        for key in arrays.keys():
+            if key.startswith(prefix):
+                part_arrays[key[len(prefix):]] = arrays[key]
+        mesh_data[part_index] = MeshData.from_arrays(part_arrays)
+    return mesh_data
+
+
+# Utility method to convert a category id to a category name
+def category_name(category):
+    # Convert NumPy scalars to Python values first, to keep the names identical to the ones from get_category
+    if isinstance(category, np.generic):
+        category = category.item()
+    return str(category)
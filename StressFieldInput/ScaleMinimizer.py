@@ -0,0 +1,115 @@
+# coding=utf-8
+
+import numpy as np
+
+
+# Class to find the stress scale with the minimum error between a minimum and maximum scale, combining golden-section
+# steps with parabolic interpolation steps (Brent's method). Every evaluation requires a job to be run, therefore
+# all evaluated errors are kept and reused for the next steps
+class ScaleMinimizer:
+    # Fraction of an interval for a golden-section step
+    GOLDEN = 0.3819660112501051
+
+    def __init__(self, evaluate, scale_min, scale_max, max_evaluations, scale_tolerance=0.0, error_tolerance=0.0):
+        # Define fields
+        self.evaluate = evaluate
+        self.scale_min = scale_min
+        self.scale_max = scale_max
+        self.max_evaluations = max_evaluations
+        self.scale_tolerance = scale_tolerance
+        self.error_tolerance = error_tolerance
+        # Evaluated scales and errors, in order of evaluation
+        self.scales = []
+        self.errors = []
+
+    # Runs the minimization, returns False if an evaluation failed
+    def minimize(self):
+        # Start by evaluating the bounds
+        for scale in [self.scale_min, self.scale_max]:
+            if not self.__evaluate(scale):
+                return False
+        # Track the last two step sizes for the parabolic steps
+        step = self.scale_max - self.scale_min
+        previous_step = step
+        while len(self.scales) < self.max_evaluations:
+            # Find the current minimum and its neighbours
+            order = np.argsort(self.scales)
+            scales = np.array(self.scales)[order]
+            errors = np.array(self.errors)[order]
+            best = np.argmin(errors)
+            left = max(best - 1, 0)
+            right = min(best + 1, len(scales) - 1)
+            # Check for convergence
+            if scales[right] - scales[left] <= self.scale_tolerance:
+                print('--> Scale tolerance reached')
+                break
+            if max(errors[left], errors[right]) - errors[best] <= self.error_tolerance:
+                print('--> Error tolerance reached')
+                break
+            # Try a parabolic step, but only if it is smaller than half the step before last
+            scale = None
+            if left < best < right:
+                scale, error = parabolic_minimum(scales[left:right + 1], errors[left:right + 1])
+                if scale is not None:
+                    # Check if the predicted minimum is close enough to the current minimum
+                    if abs(scale - scales[best]) <= self.scale_tolerance:
+                        print('--> Scale tolerance reached')
+                        break
+                    if errors[best] - error <= self.error_tolerance:
+                        print('--> Error tolerance reached')
+                        break
+                    if abs(scale - scales[best]) >= previous_step/2 or \
+                            not self.__is_new_scale(scale, scales[left], scales[right]):
+                        scale = None
+            # Otherwise, take a golden-section step in the larger interval next to the minimum
+            if scale is None:
+                if scales[right] - scales[best] > scales[best] - scales[left]:
+                    scale = scales[best] + self.GOLDEN*(scales[right] - scales[best])
+                else:
+                    scale = scales[best] - self.GOLDEN*(scales[best] - scales[left])
+                if not self.__is_new_scale(scale, scales[left], scales[right]):
+                    print('--> Scale resolution reached')
+                    break
+            # Evaluate the new scale
+            previous_step = step
+            step = abs(scale - scales[best])
+            if not self.__evaluate(scale):
+                return False
+        return True
+
+    # Fetches the scale with the minimum error
+    def get_best_scale(self):
+        return self.scales[int(np.argmin(self.errors))]
+
+    # Internal method to evaluate the error for a scale, returns False if the evaluation failed
+    def __evaluate(self, scale):
+        error = self.evaluate(len(self.scales), scale)
+        if error is None:
+            return False
+        self.scales.append(scale)
+        self.errors.append(error)
+        return True
+
+    # Internal method to check that a scale lies within bounds and has not been evaluated yet
+    def __is_new_scale(self, scale, lower, upper):
+        resolution = max(self.scale_tolerance, 1e-9*(self.scale_max - self.scale_min))/2
+        if scale <= lower or scale >= upper:
+            return False
+        return np.min(np.abs(np.array(self.scales) - scale)) > resolution
+
+
+# utility method to find the minimum of a parabola through three points, returns the scale and error at the minimum
+# or None if there is no minimum
+def parabolic_minimum(scales, errors):
+    a, b, c = scales
+    fa, fb, fc = errors
+    p = (b - a)*(b - a)*(fb - fc) - (b - c)*(b - c)*(fb - fa)
+    q = (b - a)*(fb - fc) - (b - c)*(fb - fa)
+    # The parabola must open upwards
+    if q >= 0:
+        return None, None
+    scale = b - 0.5*p/q
+    # Evaluate the parabola at its minimum
+    error = (fa*(scale - b)*(scale - c)/((a - b)*(a - c)) + fb*(scale - a)*(scale - c)/((b - a)*(b - c)) +
+             fc*(scale - a)*(scale - b)/((c - a)*(c - b)))
+    return scale, error
@@ -0,0 +1,100 @@
+# Script to run the stress field input plugin without the GUI, for instance on a compute node without a display:
+#   abaqus cae noGUI=StressFieldInput_Batch.py -- <cae file> <default job> <study file>
+# The study file is a json file with the method ("scaling", "substitution" or "resume") and the options of the method,
+# with the same names as the arguments of the respective methods in StressFieldInput_Kernel
+import inspect
+import json
+import os
+import sys
+
+# Make sure the kernel can be imported when this script is not run from the plugin directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(inspect.getsourcefile(lambda: 0))))
+
+import abaqus
+import StressFieldInput_Kernel
+
+
+# Main method which opens the model database and runs the study, returns True if the study completed
+def stress_field_input_batch(cae_file, default_job, study_file):
+    # Feedback message
+    print('=== STRESS INPUT BATCH ===')
+    # Read the study
+    print('> Reading study file "' + study_file + '"')
+    study = read_study(study_file)
+    if study is None:
+        return False
+    method = study.pop('method')
+    # Find the kernel method to run
+    methods = {
+        'scaling': StressFieldInput_Kernel.stress_field_input_scaling,
+        'substitution': StressFieldInput_Kernel.stress_field_input_substitution,
+        'resume': StressFieldInput_Kernel.stress_field_input_resume,
+    }
+    if method not in methods:
+        print('-> Unknown method "' + str(method) + '", should be one of ' + ', '.join(sorted(methods.keys())))
+        return False
+    kernel_method = methods[method]
+    # Check the options against the arguments of the kernel method
+    argspec = inspect.getargspec(kernel_method)
+    arguments = argspec.args
+    unknown = [key for key in study.keys() if key not in arguments]
+    if len(unknown) > 0:
+        print('-> Unknown options for ' + method + ': ' + ', '.join(sorted(unknown)))
+        print('-> Valid options are: ' + ', '.join([argument for argument in arguments if argument != 'default_job']))
+        return False
+    required = arguments[0:len(arguments) - len(argspec.defaults or ())]
+    missing = [argument for argument in required if argument != 'default_job' and argument not in study]
+    if len(missing) > 0:
+        print('-> Missing options for ' + method + ': ' + ', '.join(missing))
+        return False
+    # Scripts are relative to the study file
+    for key in ['stress_script', 'error_script']:
+        if study.get(key, '') != '':
+            study[key] = os.path.join(os.path.dirname(os.path.abspath(study_file)), study[key])
+    # Open the model database
+    print('> Opening model database "' + cae_file + '"')
+    abaqus.openMdb(pathName=cae_file)
+    if default_job not in abaqus.mdb.jobs.keys():
+        print('-> Job "' + default_job + '" not found in the model database')
+        return False
+    # Run the kernel method
+    study['default_job'] = default_job
+    return kernel_method(**study)
+
+
+# Reads the study from a json file, returns None if it is invalid
+def read_study(study_file):
+    try:
+        fid = open(study_file, 'r')
+        study = json.load(fid)
+        fid.close()
+    except Exception as e:
+        print('-> Study file could not be read: ' + str(e))
+        return None
+    if not isinstance(study, dict) or 'method' not in study:
+        print('-> Study file should contain an object with at least a "method"')
+        return None
+    # Convert the unicode strings from json to regular strings
+    converted = {}
+    for key in study.keys():
+        value = study[key]
+        if isinstance(value, basestring):
+            value = str(value)
+        converted[str(key)] = value
+    return converted
+
+
+# Fetches the command line arguments for this script, Abaqus passes the arguments after '--'
+def get_arguments(argv):
+    if '--' in argv:
+        return argv[argv.index('--') + 1:]
+    return argv[1:]
+
+
+if __name__ == '__main__':
+    args = get_arguments(sys.argv)
+    if len(args) != 3:
+        print('Usage: abaqus cae noGUI=StressFieldInput_Batch.py -- <cae file> <default job> <study file>')
+        sys.exit(2)
+    if not stress_field_input_batch(args[0], args[1], args[2]):
+        sys.exit(1)
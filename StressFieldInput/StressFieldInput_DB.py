@@ -116,12 +116,70 @@ class PluginDialog(abaqusGui.AFXDataDialog):
                                                   opts=abaqusGui.AFXTEXTFIELD_FLOAT | abaqusGui.LAYOUT_CENTER_Y,
                                                   defaultValue='1.0')
         self.form.kw_scale_max.setValue(1.0)
+        # Text box for the maximum number of jobs running in parallel
+        self.txt_parallel_jobs = TextFieldWithDefault(p=self.aligner_scaling, ncols=widget_width,
+                                                      labelText='Parallel Jobs', tgt=form.kw_parallel_jobs, sel=0,
+                                                      opts=abaqusGui.AFXTEXTFIELD_INTEGER | abaqusGui.LAYOUT_CENTER_Y,
+                                                      defaultValue='1')
+        self.form.kw_parallel_jobs.setValue(1)
+        # Text box for the number of cores per job
+        self.txt_cores_per_job = TextFieldWithDefault(p=self.aligner_scaling, ncols=widget_width,
+                                                      labelText='Cores per Job', tgt=form.kw_cores_per_job, sel=0,
+                                                      opts=abaqusGui.AFXTEXTFIELD_INTEGER | abaqusGui.LAYOUT_CENTER_Y,
+                                                      defaultValue='1')
+        self.form.kw_cores_per_job.setValue(1)
+        # Text box for the scale tolerance when iterating
+        self.txt_scale_tol = TextFieldWithDefault(p=self.aligner_scaling, ncols=widget_width,
+                                                  labelText='Scale Tolerance', tgt=form.kw_scale_tol, sel=0,
+                                                  opts=abaqusGui.AFXTEXTFIELD_FLOAT | abaqusGui.LAYOUT_CENTER_Y,
+                                                  defaultValue='0.0')
+        self.form.kw_scale_tol.setValue(0.0)
+        # Text box for the error tolerance when iterating
+        self.txt_error_tol = TextFieldWithDefault(p=self.aligner_scaling, ncols=widget_width,
+                                                  labelText='Error Tolerance', tgt=form.kw_error_tol, sel=0,
+                                                  opts=abaqusGui.AFXTEXTFIELD_FLOAT | abaqusGui.LAYOUT_CENTER_Y,
+                                                  defaultValue='0.0')
+        self.form.kw_error_tol.setValue(0.0)
+        # Text box for the tolerance within which stresses are merged
+        self.txt_merge_tol = TextFieldWithDefault(p=self.aligner_scaling, ncols=widget_width,
+                                                  labelText='Merge Tolerance', tgt=form.kw_merge_tol, sel=0,
+                                                  opts=abaqusGui.AFXTEXTFIELD_FLOAT | abaqusGui.LAYOUT_CENTER_Y,
+                                                  defaultValue='0.0')
+        self.form.kw_merge_tol.setValue(0.0)
+        # Text box for the number of significant digits of the stresses in the input files
+        self.txt_precision_scaling = TextFieldWithDefault(p=self.aligner_scaling, ncols=widget_width,
+                                                          labelText='Stress Precision',
+                                                          tgt=form.kw_precision_scaling, sel=0,
+                                                          opts=abaqusGui.AFXTEXTFIELD_INTEGER
+                                                          | abaqusGui.LAYOUT_CENTER_Y,
+                                                          defaultValue='12')
+        self.form.kw_precision_scaling.setValue(12)
+        # Text box for the number of processes in which the stresses are calculated
+        self.txt_processes_scaling = TextFieldWithDefault(p=self.aligner_scaling, ncols=widget_width,
+                                                          labelText='Stress Processes',
+                                                          tgt=form.kw_processes_scaling, sel=0,
+                                                          opts=abaqusGui.AFXTEXTFIELD_INTEGER
+                                                          | abaqusGui.LAYOUT_CENTER_Y,
+                                                          defaultValue='1')
+        self.form.kw_processes_scaling.setValue(1)
         # Check box to run the jobs
         self.cbx_run_jobs = abaqusGui.FXCheckButton(p=self.tab_frame_scaling, text='Run Jobs',
                                                     tgt=form.kw_run_jobs, sel=0)
         # Check box to iterate with the error script
         self.cbx_iterate = abaqusGui.FXCheckButton(p=self.tab_frame_scaling, text='Iterate',
                                                    tgt=form.kw_iterate, sel=0)
+        # Check box to write the element sets and stresses as include files
+        self.cbx_includes_scaling = abaqusGui.FXCheckButton(p=self.tab_frame_scaling, text='Use Include Files',
+                                                            tgt=form.kw_includes_scaling, sel=0)
+        # Check box to evaluate the scale factors by linear superposition of a single job
+        self.cbx_superposition = abaqusGui.FXCheckButton(p=self.tab_frame_scaling, text='Linear Superposition',
+                                                         tgt=form.kw_superposition, sel=0)
+        # Check box to verify the superposition result with an additional job
+        self.cbx_check_linearity = abaqusGui.FXCheckButton(p=self.tab_frame_scaling, text='Check Linearity',
+                                                           tgt=form.kw_check_linearity, sel=0)
+        # Check box to merge the stress sets with equal stresses
+        self.cbx_merge_sets = abaqusGui.FXCheckButton(p=self.tab_frame_scaling, text='Merge Equal Stresses',
+                                                      tgt=form.kw_merge_sets, sel=0)
         # Tab for the substitution approach
         self.tab_subst = abaqusGui.FXTabItem(p=self.tabs, text='Substitution', ic=None,
                                              opts=abaqusGui.TAB_TOP_NORMAL, x=0, y=0, w=0, h=0, pl=6, pr=6,
@@ -153,6 +211,33 @@ class PluginDialog(abaqusGui.AFXDataDialog):
                                                   opts=abaqusGui.AFXTEXTFIELD_FLOAT | abaqusGui.LAYOUT_CENTER_Y,
                                                   defaultValue='0.001')
         self.form.kw_err.setValue(0.001)
+        # Text box for the number of previous iterations used to accelerate the iteration
+        self.txt_acceleration_depth = TextFieldWithDefault(p=self.aligner_subst, ncols=8,
+                                                           labelText='Acceleration Depth',
+                                                           tgt=form.kw_acceleration_depth, sel=0,
+                                                           opts=abaqusGui.AFXTEXTFIELD_INTEGER
+                                                           | abaqusGui.LAYOUT_CENTER_Y,
+                                                           defaultValue='0')
+        self.form.kw_acceleration_depth.setValue(0)
+        # Text box for the number of significant digits of the stresses in the input files
+        self.txt_precision_subst = TextFieldWithDefault(p=self.aligner_subst, ncols=8, labelText='Stress Precision',
+                                                        tgt=form.kw_precision_substitution, sel=0,
+                                                        opts=abaqusGui.AFXTEXTFIELD_INTEGER | abaqusGui.LAYOUT_CENTER_Y,
+                                                        defaultValue='12')
+        self.form.kw_precision_substitution.setValue(12)
+        # Text box for the number of processes in which the stresses are calculated
+        self.txt_processes_subst = TextFieldWithDefault(p=self.aligner_subst, ncols=8, labelText='Stress Processes',
+                                                        tgt=form.kw_processes_substitution, sel=0,
+                                                        opts=abaqusGui.AFXTEXTFIELD_INTEGER | abaqusGui.LAYOUT_CENTER_Y,
+                                                        defaultValue='1')
+        self.form.kw_processes_substitution.setValue(1)
+        # Text box for the deviation below which the stresses of a stress set are not calculated again
+        self.txt_incremental_tol = TextFieldWithDefault(p=self.aligner_subst, ncols=8,
+                                                        labelText='Incremental Tolerance',
+                                                        tgt=form.kw_incremental_tol, sel=0,
+                                                        opts=abaqusGui.AFXTEXTFIELD_FLOAT | abaqusGui.LAYOUT_CENTER_Y,
+                                                        defaultValue='0.0')
+        self.form.kw_incremental_tol.setValue(0.0)
         # Text box for the stress input method
         self.txt_stress_method = abaqusGui.AFXTextField(p=frame_1_1, ncols=widget_width, labelText='Method',
                                                         tgt=None, sel=0,
@@ -167,6 +252,18 @@ class PluginDialog(abaqusGui.AFXDataDialog):
         self.cbx_iterate_dummy = abaqusGui.FXCheckButton(p=self.tab_frame_subst, text='Iterate', tgt=None, sel=0)
         self.cbx_iterate_dummy.setCheck(True)
         self.cbx_iterate_dummy.disable()
+        # Check box to write the element sets and stresses as include files
+        self.cbx_includes_subst = abaqusGui.FXCheckButton(p=self.tab_frame_subst, text='Use Include Files',
+                                                          tgt=form.kw_includes_substitution, sel=0)
+        # Check box to write the deviation of every element after each iteration
+        self.cbx_write_deviations = abaqusGui.FXCheckButton(p=self.tab_frame_subst, text='Write Deviations',
+                                                            tgt=form.kw_write_deviations, sel=0)
+        # Check box to run the stress and error scripts again before every iteration
+        self.cbx_reload_scripts = abaqusGui.FXCheckButton(p=self.tab_frame_subst, text='Reload Scripts',
+                                                          tgt=form.kw_reload_scripts, sel=0)
+        # Check box to only calculate the stresses of the stress sets which have changed since they were last calculated
+        self.cbx_incremental = abaqusGui.FXCheckButton(p=self.tab_frame_subst, text='Incremental',
+                                                       tgt=form.kw_incremental, sel=0)
         # Set currently selected items to their defaults (to force an update on first opening of the GUI)
         self.currentJob = -1
         self.currentStressScript = ''
@@ -235,9 +332,32 @@ class PluginDialog(abaqusGui.AFXDataDialog):
             self.form.kw_iterate.setValue(False)
             self.cbx_iterate.disable()
             self.txt_max_error.disable()
+            self.txt_scale_tol.disable()
+            self.txt_error_tol.disable()
+            self.form.kw_superposition.setValue(False)
+            self.cbx_superposition.disable()
         else:
             self.cbx_iterate.enable()
             self.txt_max_error.enable()
+            self.txt_scale_tol.enable()
+            self.txt_error_tol.enable()
+            self.cbx_superposition.enable()
+        # The merge tolerance is only used when merging stress sets
+        if self.form.kw_merge_sets.getValue():
+            self.txt_merge_tol.enable()
+        else:
+            self.txt_merge_tol.disable()
+        # The incremental tolerance is only used in incremental mode
+        if self.form.kw_incremental.getValue():
+            self.txt_incremental_tol.enable()
+        else:
+            self.txt_incremental_tol.disable()
+        # Linearity can only be checked in superposition mode
+        if self.form.kw_superposition.getValue():
+            self.cbx_check_linearity.enable()
+        else:
+            self.form.kw_check_linearity.setValue(False)
+            self.cbx_check_linearity.disable()
 
     # Override from parent class
     def processUpdates(self):
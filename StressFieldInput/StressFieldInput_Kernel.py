@@ -1,81 +1,240 @@
 import abaqus
 import numpy as np
 import traceback
+from Checkpoint import Checkpoint
 from JobBuilder import JobBuilder
+from JobBuilder import read_centroid_stresses
+from JobScheduler import JobScheduler
+from JobScheduler import job_completed
+from ScaleMinimizer import ScaleMinimizer
+from AndersonAccelerator import AndersonAccelerator
+from Instrumentation import Instrumentation
+from MeshCache import MeshCache
+from MeshCache import compute_mesh_fingerprint
 from MeshData import MeshData
+from MeshData import merge_stress_sets
 from MeshElementData import MeshElementData
+from StressPool import StressPool
+from StressSetTracker import StressSetTracker
+from UserScript import UserScript
 
 
-# Main method which runs the code with the scaling approach
+# Main method which runs the code with the scaling approach, returns True if the run completed
 def stress_field_input_scaling(default_job, stress_scale_counts, stress_scale_min, stress_scale_max,
-                               stress_script, error_script, run_jobs, iterate):
+                               stress_script, error_script, run_jobs, iterate, use_includes=False,
+                               max_parallel_jobs=1, cores_per_job=1, scale_tolerance=0.0, error_tolerance=0.0,
+                               superposition=False, check_linearity=False, merge_sets=False, merge_tolerance=0.0,
+                               stress_precision=12, stress_processes=1):
     # Feedback message
     print('=== STRESS INPUT START ===')
     print('> Running stress scaling approach')
+    # Record the time and memory spent in each phase
+    instrumentation = Instrumentation('scaling')
+    # The stress script is run once, when it is checked
+    stress_module = UserScript(stress_script, 'stress_script')
+    success = False
     # Run checks
-    if run_scaling_checks(
-            default_job, stress_scale_counts, stress_scale_min, stress_scale_max, stress_script, run_jobs, iterate):
+    if instrumentation.measure('checks', run_scaling_checks, default_job, stress_scale_counts, stress_scale_min,
+                               stress_scale_max, stress_module, run_jobs, iterate, max_parallel_jobs, cores_per_job,
+                               scale_tolerance, error_tolerance, superposition, merge_tolerance, stress_precision,
+                               stress_processes):
         # Characterize the mesh
-        mesh_data = characterize_mesh(default_job, stress_script)
+        mesh_data = instrumentation.measure('characterize_mesh', characterize_mesh, default_job, stress_module)
         # Do not continue if there is no mesh
         if mesh_data is None:
-            print_exit_message()
-            return
+            print_exit_message(instrumentation)
+            return False
         # Calculate the stresses
         print("> Calculating stresses")
-        mesh_data = define_stresses(mesh_data, stress_script)
+        stress_pool = StressPool(stress_script, stress_processes)
+        try:
+            mesh_data = instrumentation.measure('define_stresses', define_stresses, mesh_data, stress_module, None,
+                                                stress_pool)
+        finally:
+            stress_pool.close()
         if mesh_data is None:
-            print_exit_message()
-            return
+            print_exit_message(instrumentation)
+            return False
+        # Merge the stress sets with equal stresses
+        if merge_sets:
+            print('> Merging stress sets with equal stresses')
+            mesh_data = instrumentation.measure('merge_stress_sets', merge_equal_stress_sets, mesh_data,
+                                                merge_tolerance)
         # Create a job builder:
         print('> Creating job definition')
-        job_builder = JobBuilder(default_job, mesh_data)
+        job_builder = instrumentation.measure('create_job_builder', JobBuilder, default_job, mesh_data, use_includes,
+                                              stress_precision=stress_precision)
         # Run the logic
-        print('> Running scaling logic')
-        stress_scales, errors = run_scaling_logic(job_builder, stress_scale_counts, stress_scale_min, stress_scale_max,
-                                                  run_jobs, error_script, iterate)
+        if superposition:
+            print('> Running superposition logic')
+            stress_scales, errors = instrumentation.measure(
+                'superposition_logic', run_superposition_logic, job_builder, stress_scale_counts, stress_scale_min,
+                stress_scale_max, error_script, iterate, cores_per_job, scale_tolerance, error_tolerance,
+                check_linearity, instrumentation)
+        else:
+            # Store the state after each job to be able to resume the run
+            checkpoint = Checkpoint(default_job)
+            checkpoint.start('scaling', {
+                'stress_scale_counts': stress_scale_counts, 'stress_scale_min': stress_scale_min,
+                'stress_scale_max': stress_scale_max, 'stress_script': stress_script, 'error_script': error_script,
+                'run_jobs': run_jobs, 'iterate': iterate, 'use_includes': use_includes,
+                'max_parallel_jobs': max_parallel_jobs, 'cores_per_job': cores_per_job,
+                'scale_tolerance': scale_tolerance, 'error_tolerance': error_tolerance,
+                'stress_precision': stress_precision, 'stress_processes': stress_processes,
+            }, mesh_data, job_builder.get_injections())
+            print('> Running scaling logic')
+            stress_scales, errors = instrumentation.measure(
+                'scaling_logic', run_scaling_logic, job_builder, stress_scale_counts, stress_scale_min,
+                stress_scale_max, run_jobs, error_script, iterate, max_parallel_jobs, cores_per_job, scale_tolerance,
+                error_tolerance, checkpoint, instrumentation)
         print('-> Job logic completed')
         # Output the results
         output_scales_and_error(stress_scales, errors)
+        success = stress_scales is not None
     # Feedback message
-    print_exit_message()
+    print_exit_message(instrumentation)
+    return success
 
 
-# Main method which runs the code with the substitution approach
-def stress_field_input_substitution(default_job, max_it, max_dev, max_err, stress_script, error_script):
+# Main method which runs the code with the substitution approach, returns True if the run completed
+def stress_field_input_substitution(default_job, max_it, max_dev, max_err, stress_script, error_script,
+                                    use_includes=False, write_deviations=False, acceleration_depth=0,
+                                    stress_precision=12, reload_scripts=False, incremental=False,
+                                    incremental_tolerance=0.0, stress_processes=1):
     # Feedback message
     print('=== STRESS INPUT START ===')
     print('> Running stress substitution approach')
+    # Record the time and memory spent in each phase
+    instrumentation = Instrumentation('substitution')
+    # The stress script is run once, when it is checked, unless the scripts are reloaded for every iteration
+    stress_module = UserScript(stress_script, 'stress_script')
+    success = False
     # Run checks
-    if run_subst_checks(
-            default_job, max_it, max_dev, max_err, stress_script):
+    if instrumentation.measure('checks', run_subst_checks, default_job, max_it, max_dev, max_err, stress_module,
+                               acceleration_depth, stress_precision, incremental_tolerance, stress_processes):
         # Characterize the mesh
-        mesh_data = characterize_mesh(default_job, stress_script)
+        mesh_data = instrumentation.measure('characterize_mesh', characterize_mesh, default_job, stress_module)
         # Do not continue if there is no mesh
         if mesh_data is None:
-            print_exit_message()
-            return
+            print_exit_message(instrumentation)
+            return False
         # Create a job builder:
         print('> Creating job definition')
-        job_builder = JobBuilder(default_job, mesh_data)
+        job_builder = instrumentation.measure('create_job_builder', JobBuilder, default_job, mesh_data, use_includes,
+                                              stress_precision=stress_precision, cache_lines=incremental)
+        # Store the state after each iteration to be able to resume the run
+        checkpoint = Checkpoint(default_job)
+        checkpoint.start('substitution', {
+            'max_it': max_it, 'max_dev': max_dev, 'max_err': max_err, 'stress_script': stress_script,
+            'error_script': error_script, 'use_includes': use_includes, 'write_deviations': write_deviations,
+            'acceleration_depth': acceleration_depth, 'stress_precision': stress_precision,
+            'reload_scripts': reload_scripts, 'incremental': incremental,
+            'incremental_tolerance': incremental_tolerance, 'stress_processes': stress_processes,
+        }, mesh_data, job_builder.get_injections(), True)
         # Run the logic
         print('> Running substitution logic')
-        deviations, errors = run_subst_logic(job_builder, max_it, max_dev, max_err, stress_script, error_script)
+        stress_pool = StressPool(stress_script, stress_processes)
+        try:
+            deviations, errors = instrumentation.measure(
+                'substitution_logic', run_subst_logic, job_builder, max_it, max_dev, max_err, stress_module,
+                error_script, write_deviations, acceleration_depth, reload_scripts, incremental,
+                incremental_tolerance, stress_pool, checkpoint, instrumentation)
+        finally:
+            stress_pool.close()
         if deviations is not None:
             print('-> Job logic completed')
         # Output the results
         output_deviation_and_error(deviations, errors)
+        success = deviations is not None
+    # Feedback message
+    print_exit_message(instrumentation)
+    return success
+
+
+# Main method which resumes a run of the scaling or substitution approach from its last checkpoint, returns True if
+# the run completed
+def stress_field_input_resume(default_job):
+    # Feedback message
+    print('=== STRESS INPUT START ===')
+    checkpoint = Checkpoint(default_job)
+    print('> Resuming from checkpoint "' + checkpoint.file_name + '"')
+    # Load the checkpoint
+    if not checkpoint.load():
+        print('-> No checkpoint found for job ' + default_job)
+        print_exit_message()
+        return False
+    parameters = checkpoint.parameters
+    # Record the time and memory spent in each phase
+    instrumentation = Instrumentation(checkpoint.method + ' (resumed)')
+    stress_module = UserScript(parameters['stress_script'], 'stress_script')
+    success = False
+    # Run checks
+    if instrumentation.measure('checks', run_common_checks, default_job, stress_module):
+        if checkpoint.completed:
+            print('-> The run has already been completed')
+        else:
+            # Create a job builder from the stored mesh data and injection lines, only the substitution approach has
+            # the incremental option
+            print('> Creating job definition')
+            job_builder = instrumentation.measure('create_job_builder', JobBuilder, default_job,
+                                                  checkpoint.mesh_data, parameters['use_includes'],
+                                                  checkpoint.injections, parameters['stress_precision'],
+                                                  parameters.get('incremental', False))
+        if checkpoint.method == 'scaling':
+            if checkpoint.completed:
+                stress_scales = checkpoint.results.get('stress_scales')
+                errors = checkpoint.results.get('errors')
+            else:
+                print('> Running scaling logic')
+                stress_scales, errors = instrumentation.measure(
+                    'scaling_logic', run_scaling_logic, job_builder, parameters['stress_scale_counts'],
+                    parameters['stress_scale_min'], parameters['stress_scale_max'], parameters['run_jobs'],
+                    parameters['error_script'], parameters['iterate'], parameters['max_parallel_jobs'],
+                    parameters['cores_per_job'], parameters['scale_tolerance'], parameters['error_tolerance'],
+                    checkpoint, instrumentation)
+                print('-> Job logic completed')
+            # Output the results
+            output_scales_and_error(stress_scales, errors)
+            success = stress_scales is not None
+        elif checkpoint.method == 'substitution':
+            if checkpoint.completed:
+                deviations = checkpoint.results.get('deviations')
+                errors = checkpoint.results.get('errors')
+            else:
+                print('> Running substitution logic')
+                stress_pool = StressPool(parameters['stress_script'], parameters['stress_processes'])
+                try:
+                    deviations, errors = instrumentation.measure(
+                        'substitution_logic', run_subst_logic, job_builder, parameters['max_it'],
+                        parameters['max_dev'], parameters['max_err'], stress_module, parameters['error_script'],
+                        parameters['write_deviations'], parameters['acceleration_depth'],
+                        parameters['reload_scripts'], parameters['incremental'], parameters['incremental_tolerance'],
+                        stress_pool, checkpoint, instrumentation)
+                finally:
+                    stress_pool.close()
+                if deviations is not None:
+                    print('-> Job logic completed')
+            # Output the results
+            output_deviation_and_error(deviations, errors)
+            success = deviations is not None
+        else:
+            print('-> Unknown method "' + checkpoint.method + '" in checkpoint')
     # Feedback message
-    print_exit_message()
+    print_exit_message(instrumentation)
+    return success
 
 
-# Prints the end feedback message
-def print_exit_message():
+# Prints the end feedback message, after writing the run report if the run is instrumented
+def print_exit_message(instrumentation=None):
+    if instrumentation is not None:
+        instrumentation.write()
     print('=== STRESS INPUT FINISHED ===')
 
 
 # Method checking if all prerequisites are met before running the scaling code
-def run_scaling_checks(default_job, stress_scale_counts, stress_scale_min, stress_scale_max, stress_script, run_jobs, iterate):
+def run_scaling_checks(default_job, stress_scale_counts, stress_scale_min, stress_scale_max, stress_module, run_jobs,
+                       iterate, max_parallel_jobs=1, cores_per_job=1, scale_tolerance=0.0, error_tolerance=0.0,
+                       superposition=False, merge_tolerance=0.0, stress_precision=12, stress_processes=1):
     # Feedback message
     print('> Performing checks')
     print('-> Checking inputs and MDB')
@@ -98,12 +257,37 @@ def run_scaling_checks(default_job, stress_scale_counts, stress_scale_min, stres
     if iterate and not run_jobs:
         print('-> Can not iterate without running jobs, set "Run Jobs" must be set to true')
         return False
+    # Check if run_jobs is defined if superposition is defined
+    if superposition and not run_jobs:
+        print('-> Can not use superposition without running jobs, set "Run Jobs" must be set to true')
+        return False
     # Check if there are sufficient scales defined for iterating
     if iterate and stress_scale_counts < 3:
         print('-> At least 2 scale counts are needed to start iterating')
         return False
+    # Check the job parallelism settings
+    if max_parallel_jobs < 1:
+        print('-> Number of parallel jobs should be at least 1')
+        return False
+    if cores_per_job < 1:
+        print('-> Number of cores per job should be at least 1')
+        return False
+    # Check the iteration tolerances
+    if scale_tolerance < 0 or error_tolerance < 0:
+        print('-> Scale and error tolerances should not be negative')
+        return False
+    # Check the merge tolerance
+    if merge_tolerance < 0:
+        print('-> Merge tolerance should not be negative')
+        return False
+    # Check the stress precision
+    if not check_stress_precision(stress_precision):
+        return False
+    # Check the number of stress processes
+    if not check_stress_processes(stress_processes):
+        return False
     # Run common checks
-    if run_common_checks(default_job, stress_script):
+    if run_common_checks(default_job, stress_module):
         # All checks passed
         print('-> Checks passed')
         return True
@@ -112,7 +296,8 @@ def run_scaling_checks(default_job, stress_scale_counts, stress_scale_min, stres
 
 
 # Method checking if all prerequisites are met before running the substitution code
-def run_subst_checks(default_job, max_it, max_dev, max_err, stress_script):
+def run_subst_checks(default_job, max_it, max_dev, max_err, stress_module, acceleration_depth=0,
+                     stress_precision=12, incremental_tolerance=0.0, stress_processes=1):
     # Feedback message
     print('> Performing checks')
     print('-> Checking inputs and MDB')
@@ -128,8 +313,22 @@ def run_subst_checks(default_job, max_it, max_dev, max_err, stress_script):
     if max_err <= 0:
         print('-> Maximum deviation should be larger than 0')
         return False
+    # Check if the acceleration depth is not negative
+    if acceleration_depth < 0:
+        print('-> Invalid acceleration depth, should be at least 0')
+        return False
+    # Check the incremental tolerance
+    if incremental_tolerance < 0:
+        print('-> Incremental tolerance should not be negative')
+        return False
+    # Check the stress precision
+    if not check_stress_precision(stress_precision):
+        return False
+    # Check the number of stress processes
+    if not check_stress_processes(stress_processes):
+        return False
     # Run common checks
-    if run_common_checks(default_job, stress_script):
+    if run_common_checks(default_job, stress_module):
         # All checks passed
         print('-> Checks passed')
         return True
@@ -137,8 +336,24 @@ def run_subst_checks(default_job, max_it, max_dev, max_err, stress_script):
         return False
 
 
+# Method checking if the number of significant digits of the stresses in the input files is valid
+def check_stress_precision(stress_precision):
+    if stress_precision < 1 or stress_precision > 17:
+        print('-> Stress precision should be between 1 and 17 significant digits')
+        return False
+    return True
+
+
+# Method checking if the number of processes to calculate the stresses with is valid
+def check_stress_processes(stress_processes):
+    if stress_processes < 1:
+        print('-> Number of stress processes should be at least 1')
+        return False
+    return True
+
+
 # Method checking if all common prerequisites are met
-def run_common_checks(default_job, stress_script):
+def run_common_checks(default_job, stress_module):
     # Check if there is an active model
     if len(abaqus.mdb.models.keys()) <= 0:
         print('-> No active model')
@@ -157,31 +372,49 @@ def run_common_checks(default_job, stress_script):
         print('-> Invalid default job')
         return False
     # Attempt to run the stress script
-    if not check_stress_script(stress_script):
+    if not check_stress_script(stress_module):
         print('-> Stress script invalid')
         return False
     # Return True as all checks have passed
     return True
 
 
-# Method to check if the stress script has been properly defined
-def check_stress_script(stress_script):
+# Method to check if the stress script has been properly defined, by loading it
+def check_stress_script(stress_module):
     # Feedback message
     print('-> Checking stress script')
     # Try to run the script
     try:
-        execfile(stress_script, globals())
+        stress_module.load()
     except Exception:
         # If it fails, return
         print('--> Stress script threw an error')
         print(traceback.format_exc())
         return False
+    # Check if the optional batch stress calculation method exists
+    batch = stress_module.has_variable('calculate_stress_batch')
+    if batch:
+        # Check if the method is callable
+        func = stress_module.get('calculate_stress_batch')
+        if not callable(func):
+            print('--> Function "calculate_stress_batch" not callable in stress script')
+            return False
+        print('--> Function "calculate_stress_batch" detected in stress script')
+        # Check the method arguments
+        import inspect
+        arg_spec = inspect.getargspec(func)
+        if len(arg_spec.args) != 5:
+            print('--> Invalid arguments for "calculate_stress_batch"; should have precisely 5:'
+                  ' "part", "xs", "ys", "zs", and "prev_stresses".')
     # Check now if the stress calculation method exists
-    if 'calculate_stress' not in globals().keys():
+    if not stress_module.has_variable('calculate_stress'):
+        if batch:
+            # The batch method is sufficient
+            return True
         print('--> Function "calculate_stress" not defined in stress script')
         return False
     # Check if the method is callable
-    func = globals()['calculate_stress']
+    func = stress_module.get('calculate_stress')
     if not callable(func):
         print('--> Function "calculate_stress" not callable in stress script')
         return False
@@ -194,25 +427,19 @@ def check_stress_script(stress_script):
     return True
 
 
-# Method to characterize the mesh
-def characterize_mesh(default_job, stress_script):
+# Method to characterize the mesh, the stress script must have been loaded
+def characterize_mesh(default_job, stress_module):
     # Feedback message
     print("> Characterizing mesh")
-    # Run the stress script to enable access to the get_category() method at the current level
-    categorize = True
-    try:
-        execfile(stress_script, globals())  # Pass in globals() to load the script's contents to the global dictionary
-    except Exception:
-        # If it fails, don't categorize
-        categorize = False
-    # Check if the categorization function is implemented
-    if categorize:
-        categorize = 'get_category' in globals().keys()
-        if categorize:
-            func = globals()['get_category']
-            categorize = callable(func)
-            if categorize:
-                print('-> Function "get_category" detected in stress script')
+    # Check if the categorization function or its batch version is implemented in the stress script
+    categorize_batch = stress_module.has_function('get_category_batch')
+    categorize = categorize_batch or stress_module.has_function('get_category')
+    if categorize_batch:
+        get_category_batch = stress_module.get('get_category_batch')
+        print('-> Function "get_category_batch" detected in stress script')
+    elif categorize:
+        get_category = stress_module.get('get_category')
+        print('-> Function "get_category" detected in stress script')
     # Fetch the job
     job = abaqus.mdb.jobs[default_job]
     # Fetch the model from the job
@@ -223,6 +450,18 @@ def characterize_mesh(default_job, stress_script):
     # Fetch the instances in the assembly
     instances = model.rootAssembly.allInstances
     instance_count = len(instances.keys())
+    # Reuse the characterized mesh of a previous run if neither the mesh nor the categorization have changed
+    mesh_cache = MeshCache(default_job)
+    # Fetch the node coordinates once, they are used for both the fingerprint and the element centroids
+    node_coordinates = [fetch_node_coordinates(instances[instance_key]) for instance_key in instances.keys()]
+    if categorize:
+        fingerprint = compute_mesh_fingerprint(instances, node_coordinates, stress_module.file_name)
+    else:
+        fingerprint = compute_mesh_fingerprint(instances, node_coordinates, None)
+    mesh_data = mesh_cache.load(fingerprint)
+    if mesh_data is not None:
+        print('-> Mesh has not changed, using the cached characterization from "' + mesh_cache.file_name + '"')
+        return mesh_data
     # Log element data for each of the instances
     mesh_data = np.empty(instance_count, dtype=object)
     no_mesh = True
@@ -239,45 +478,50 @@ def characterize_mesh(default_job, stress_script):
             no_mesh = False
             # Create mesh data for the part
             mesh_data_part = MeshData.create_mesh_data(element_count, categorize)
-            # tracker for progress
-            progress = -1
-            for element_index in np.arange(0, element_count):
-                # Update progress feedback
-                if np.floor(10*element_index/element_count) >= progress:
-                    progress = progress + 1
-                    print('-> ' + str(10*progress) + '%')
-                # Fetch the element
-                element = elements[element_index]
-                # fetch the label
-                label = element.label
-                # fetch the centre coordinates
-                x = 0
-                y = 0
-                z = 0
-                node_count = len(element.getNodes())
-                for node in element.getNodes():
-                    coordinates = node.coordinates
-                    x = x + coordinates[0]
-                    y = y + coordinates[1]
-                    z = z + coordinates[2]
-                x = (x + 0.0) / node_count
-                y = (y + 0.0) / node_count
-                z = (z + 0.0) / node_count
-                # create a new mesh element data object
-                element_data = MeshElementData(instance_key, part_name, label, x, y, z)
-                # Identify the category
-                if categorize:
+            # Compute the element labels and centre coordinates
+            labels, centroids = compute_element_centroids(instance, node_coordinates[instance_index])
+            if categorize_batch:
+                # Identify the categories of all elements at once
+                try:
+                    categories = get_category_batch(part_name, centroids[:, 0], centroids[:, 1], centroids[:, 2])
+                    if len(categories) != element_count:
+                        raise ValueError('Expected ' + str(element_count) + ' categories, got ' + str(len(categories)))
+                except Exception:
+                    # If categorization script fails, cancel
+                    print('-> Function "get_category_batch" failed for ' + instance_key + ', aborting')
+                    print(traceback.format_exc())
+                    return None
+                # Store all mesh elements at once, grouped by category
+                mesh_data_part.add_elements(instance_key, part_name, labels, centroids, categories)
+            elif categorize:
+                # tracker for progress
+                progress = -1
+                for element_index in np.arange(0, element_count):
+                    # Update progress feedback
+                    if np.floor(10*element_index/element_count) >= progress:
+                        progress = progress + 1
+                        print('-> ' + str(10*progress) + '%')
+                    # fetch the label
+                    label = labels[element_index]
+                    # fetch the centre coordinates
+                    x = centroids[element_index, 0]
+                    y = centroids[element_index, 1]
+                    z = centroids[element_index, 2]
+                    # create a new mesh element data object
+                    element_data = MeshElementData(instance_key, part_name, label, x, y, z)
+                    # Identify the category
                     try:
                         category = get_category(part_name, x, y, z)
                     except Exception:
                         # If categorization script fails, cancel
-                        print('-> Function "get_category" failed for element ' + element.get_label() + ', aborting')
+                        print('-> Function "get_category" failed for element ' + str(label) + ', aborting')
                         print(traceback.format_exc())
                         return None
-                else:
-                    category = None
-                # Store the mesh element
-                mesh_data_part.add_element(element_data, category)
+                    # Store the mesh element
+                    mesh_data_part.add_element(element_data, category)
+            else:
+                # Store all mesh elements at once
+                mesh_data_part.add_elements(instance_key, part_name, labels, centroids)
             # Store the categories
             mesh_data[instance_index] = mesh_data_part
         else:
@@ -286,57 +530,238 @@ def characterize_mesh(default_job, stress_script):
     if no_mesh:
         print('-> No mesh present, aborting')
         return None
+    # Cache the characterized mesh for the next runs
+    mesh_cache.save(fingerprint, mesh_data)
     return mesh_data
 
 
-# Method to define the stress data
-def define_stresses(mesh_data, stress_script):
-    # Run the script to enable access to the calculate_stress() method at the current level
+# Method to fetch the coordinates of all nodes in an instance as an array
+def fetch_node_coordinates(instance):
+    return np.array([node.coordinates for node in instance.nodes], dtype=np.float64).reshape((-1, 3))
+
+
+# Method to compute the labels and centre coordinates of all elements in an instance from its node coordinates
+def compute_element_centroids(instance, coordinates):
     try:
-        execfile(stress_script, globals())  # Pass in globals() to load the script's contents to the global dictionary
+        return compute_element_centroids_bulk(instance, coordinates)
     except Exception:
-        # If it fails, return None
-        print('---> Stress script threw an error')
-        print(traceback.format_exc())
-        return None
+        # If the bulk computation fails, fall back to iterating over the elements
+        print('-> Bulk centroid computation failed, iterating over elements instead')
+        return compute_element_centroids_by_element(instance)
+
+
+# Method to compute the element centroids in bulk from the node coordinates and the element connectivity
+def compute_element_centroids_bulk(instance, coordinates):
+    elements = instance.elements
+    # Fetch all element connectivities at once
+    connectivity = [element.connectivity for element in elements]
+    labels = np.array([element.label for element in elements], dtype=np.int64)
+    # Group the elements by their number of nodes to support mixed element types
+    widths = np.array([len(nodes) for nodes in connectivity], dtype=np.int64)
+    unique_widths = np.unique(widths)
+    centroids = np.zeros((len(connectivity), 3), dtype=np.float64)
+    for width in unique_widths:
+        if len(unique_widths) == 1:
+            indices = np.arange(0, len(connectivity))
+            node_indices = np.array(connectivity, dtype=np.int64)
+        else:
+            indices = np.nonzero(widths == width)[0]
+            node_indices = np.array([connectivity[i] for i in indices], dtype=np.int64)
+        # Check that the connectivity refers to valid node indices
+        if node_indices.min() < 0 or node_indices.max() >= len(coordinates):
+            raise IndexError('Element connectivity refers to nodes outside of the instance')
+        # Gather the node coordinates and average them per element
+        centroids[indices] = coordinates[node_indices].mean(axis=1)
+    return labels, centroids
+
+
+# Method to compute the element centroids by iterating over the elements and their nodes
+def compute_element_centroids_by_element(instance):
+    elements = instance.elements
+    element_count = len(elements)
+    labels = np.zeros(element_count, dtype=np.int64)
+    centroids = np.zeros((element_count, 3), dtype=np.float64)
+    for element_index in np.arange(0, element_count):
+        # Fetch the element
+        element = elements[element_index]
+        # fetch the label
+        labels[element_index] = element.label
+        # fetch the centre coordinates
+        x = 0
+        y = 0
+        z = 0
+        nodes = element.getNodes()
+        for node in nodes:
+            coordinates = node.coordinates
+            x = x + coordinates[0]
+            y = y + coordinates[1]
+            z = z + coordinates[2]
+        centroids[element_index, 0] = (x + 0.0) / len(nodes)
+        centroids[element_index, 1] = (y + 0.0) / len(nodes)
+        centroids[element_index, 2] = (z + 0.0) / len(nodes)
+    return labels, centroids
+
+
+# Method to define the stress data with the functions of the stress script, which must have been loaded. Optionally,
+# only the given rows of stress sets are evaluated for each instance, the other stress sets keep their stresses. If a
+# stress pool is given, the "calculate_stress" function is evaluated in its worker processes
+def define_stresses(mesh_data, stress_module, rows=None, stress_pool=None):
+    # Check if the stresses can be calculated in batches
+    batch = stress_module.has_function('calculate_stress_batch')
     # Iterate over part instances
     for part_index in np.arange(0, len(mesh_data)):
         mesh_data_part = mesh_data[part_index]
         if mesh_data_part is None:
             continue
-        # Iterate over stress sets
-        for stress_set in mesh_data_part.get_stress_sets():
-            # Calculate the stress (method will be available from the stress script)
-            instance_name = stress_set.get_instance_name()
-            x = stress_set.get_x()
-            y = stress_set.get_y()
-            z = stress_set.get_z()
+        # Skip instances without stress sets, for instance when none of their elements has a category
+        if mesh_data_part.get_stress_set_count() <= 0:
+            continue
+        part_rows = None
+        if rows is not None:
+            part_rows = rows[part_index]
+            if len(part_rows) <= 0:
+                continue
+        if batch:
+            define_stresses_batch(mesh_data_part, stress_module, part_rows, stress_pool)
+        else:
+            define_stresses_by_set(mesh_data_part, stress_module, part_rows, stress_pool)
+    return mesh_data
+
+
+# Method to merge the stress sets with equal stresses of all instances
+def merge_equal_stress_sets(mesh_data, tolerance):
+    merged = np.empty(len(mesh_data), dtype=object)
+    for part_index in np.arange(0, len(mesh_data)):
+        mesh_data_part = mesh_data[part_index]
+        if mesh_data_part is None:
+            continue
+        # Instances without stress sets have nothing to merge
+        if mesh_data_part.get_stress_set_count() <= 0:
+            merged[part_index] = mesh_data_part
+            continue
+        merged[part_index] = merge_stress_sets(mesh_data_part, tolerance)
+        print('-> Merged ' + str(mesh_data_part.get_stress_set_count()) + ' stress sets into ' +
+              str(merged[part_index].get_stress_set_count()) + ' for ' + mesh_data_part.get_instance_name())
+    return merged
+
+
+# Method to define the stresses of an instance by calling the stress script for every stress set, in the worker
+# processes of the stress pool if one is given
+def define_stresses_by_set(mesh_data_part, stress_module, rows=None, stress_pool=None):
+    calculate_stress = stress_module.get('calculate_stress')
+    # Only evaluate the given rows of stress sets, if any
+    stress_sets = mesh_data_part.get_stress_sets()
+    if rows is not None:
+        stress_sets = [stress_sets[row] for row in rows]
+    # Calculate the stresses in the worker processes, in the order of the stress sets
+    results = None
+    if stress_pool is not None and stress_pool.start():
+        results = stress_pool.evaluate([(stress_set.get_instance_name(), stress_set.get_x(), stress_set.get_y(),
+                                         stress_set.get_z(), stress_set.get_stress()) for stress_set in stress_sets])
+    # Iterate over stress sets
+    for index in np.arange(0, len(stress_sets)):
+        stress_set = stress_sets[index]
+        # Calculate the stress
+        instance_name = stress_set.get_instance_name()
+        x = stress_set.get_x()
+        y = stress_set.get_y()
+        z = stress_set.get_z()
+        if results is not None:
+            stress, error = results[index]
+        else:
             try:
                 stress = calculate_stress(instance_name, x, y, z, stress_set.get_stress())
+                error = None
             except Exception:
-                # If stress script fails, print error and default to None
-                coords = '(' + str(x) + ', ' + str(y) + ', ' + str(z) + ')'
-                print('---> Stress script threw an error during calculation for ' + instance_name + ' at ' + coords)
-                print(traceback.format_exc())
                 stress = None
-            # Define the stress
-            stress_set.define_stress(stress)
-    return mesh_data
+                error = traceback.format_exc()
+        if error is not None:
+            # If stress script fails, print error and default to None
+            coords = '(' + str(x) + ', ' + str(y) + ', ' + str(z) + ')'
+            print('---> Stress script threw an error during calculation for ' + instance_name + ' at ' + coords)
+            print(error)
+        # Define the stress
+        stress_set.define_stress(stress)
+
+
+# Method to define the stresses of an instance with a single call to the batch function of the stress script
+def define_stresses_batch(mesh_data_part, stress_module, rows=None, stress_pool=None):
+    # Fetch the stress set coordinates and previous stresses
+    instance_name = mesh_data_part.get_instance_name()
+    centroids = mesh_data_part.get_stress_set_centroids()
+    prev_stresses = mesh_data_part.get_stress_set_stresses()
+    evaluated_stresses = prev_stresses
+    # Only evaluate the given rows of stress sets, if any
+    if rows is not None:
+        centroids = centroids[rows]
+        evaluated_stresses = prev_stresses[rows]
+    xs = centroids[:, 0]
+    ys = centroids[:, 1]
+    zs = centroids[:, 2]
+    # Calculate the stresses
+    calculate_stress_batch = stress_module.get('calculate_stress_batch')
+    try:
+        stresses = np.asarray(calculate_stress_batch(instance_name, xs, ys, zs, evaluated_stresses), dtype=np.float64)
+        if stresses.shape != (len(centroids), 6):
+            raise ValueError('Expected stresses of shape ' + str((len(centroids), 6)) + ', got ' + str(stresses.shape))
+    except Exception:
+        print('---> Stress script threw an error during batch calculation for ' + instance_name)
+        print(traceback.format_exc())
+        # Calculate the stresses one by one to find the offending stress sets
+        if stress_module.has_function('calculate_stress'):
+            print('---> Calculating the stresses one by one instead')
+            define_stresses_by_set(mesh_data_part, stress_module, rows, stress_pool)
+        else:
+            defined = np.zeros(len(prev_stresses), dtype=bool)
+            if rows is not None:
+                defined = np.all(np.isfinite(prev_stresses), axis=1)
+                defined[rows] = False
+            mesh_data_part.define_stress_set_stresses(prev_stresses, defined)
+        return
+    # Rows with values which are not finite are invalid
+    defined = np.all(np.isfinite(stresses), axis=1)
+    invalid_rows = np.nonzero(~defined)[0]
+    report_limit = 10
+    for row in invalid_rows[0:report_limit]:
+        coords = '(' + str(xs[row]) + ', ' + str(ys[row]) + ', ' + str(zs[row]) + ')'
+        stress_set_row = row if rows is None else rows[row]
+        print('---> Stress script returned invalid stresses in row ' + str(stress_set_row) + ' for ' + instance_name +
+              ' at ' + coords)
+    if len(invalid_rows) > report_limit:
+        print('---> ' + str(len(invalid_rows) - report_limit) + ' more rows with invalid stresses for ' + instance_name)
+    # The stress sets which were not evaluated keep their previous stresses
+    if rows is not None:
+        all_defined = np.all(np.isfinite(prev_stresses), axis=1)
+        all_defined[rows] = defined
+        prev_stresses[rows] = stresses
+        stresses = prev_stresses
+        defined = all_defined
+    # Define the stresses
+    mesh_data_part.define_stress_set_stresses(stresses, defined)
 
 
 # Run scaling logic
 def run_scaling_logic(job_builder, stress_scale_counts, stress_scale_min, stress_scale_max, run_jobs, error_script,
-                      iterate):
+                      iterate, max_parallel_jobs=1, cores_per_job=1, scale_tolerance=0.0, error_tolerance=0.0,
+                      checkpoint=None, instrumentation=None):
+    # Record the time spent on each job, a report is only written if the run is instrumented
+    if instrumentation is None:
+        instrumentation = Instrumentation()
     # Initialize empty arrays for the jobs, stress scales and errors
     jobs = [None] * stress_scale_counts
     stress_scales = np.zeros(stress_scale_counts)
     errors = np.zeros(stress_scale_counts)
+    # Fetch the results of a previous run from the checkpoint
+    previous_results = {}
+    if checkpoint is not None:
+        previous_results = checkpoint.results
     # Check if error calculation is required
     run_errors = run_jobs and (error_script is not None) and (error_script != '')
-    # If error calculation is required run the error script
+    # If error calculation is required run the error script once
+    error_module = UserScript(error_script, 'error_script')
     if run_errors:
         try:
-            execfile(error_script, globals())  # Pass in globals() to load the script's contents to the global dict
+            error_module.load()
         except Exception:
             # If it fails, turn off error calculation
             print('-> Error script threw an error')
@@ -350,62 +775,40 @@ def run_scaling_logic(job_builder, stress_scale_counts, stress_scale_min, stress
         if not run_errors:
             print('--> Can not iterate without properly defined error script')
             return None, None
-        # Define tracking variables
-        current_min_index = -1
-        previous_index = -1
-        # Iterate
-        for i in np.arange(0, stress_scale_counts):
-            # Determine stress scale
-            if i == 0:
-                # Do the first iteration at the minimum scale factor
-                stress_scales[i] = stress_scale_min
-            elif i == 1:
-                # Do the second iteration at the minimum scale factor
-                stress_scales[i] = stress_scale_max
-            else:
-                # Do the third iteration at the average of the current minimum and the previous scale factors
-                stress_scales[i] = (stress_scales[current_min_index] + stress_scales[previous_index])/2
-            # Generate the job
-            print('--> Creating job for stress factor ' + str(stress_scales[i]))
-            jobs[i] = job_builder.create_job(i + 1, stress_scales[i])
-            # Run the job
-            print('--> Running job ' + str(i + 1) + ' of ' + str(len(jobs)))
-            jobs[i].submit()
-            jobs[i].waitForCompletion()
-            # Calculate the errors
-            print('--> Calculating error for job ' + str(i + 1) + ' of ' + str(len(jobs)))
-            # open the ODB
-            odb = abaqus.session.openOdb(jobs[i].name + ".odb", readOnly=True)
-            # Calculate the error (method will be available from the error script)
-            try:
-                errors[i] = calculate_error(abaqus.session, odb)
-            except Exception:
-                # If an error script fails, abort
-                print('---> Error script threw an error during calculation, aborting')
-                print(traceback.format_exc())
-                return None, None
-            print('--> Error = ' + str(errors[i]))
-            # Update tracking parameters
-            if i == 0:
-                # First iteration is straightforward
-                current_min_index = 0
-            elif i == 1:
-                # After second iteration an initial update is needed
-                if errors[i] < errors[current_min_index]:
-                    current_min_index = 1
-                    previous_index = 0
-                else:
-                    previous_index = 1
+        # Minimize the error, a job is run for every evaluated scale. The minimization is deterministic, therefore the
+        # errors of the scales evaluated before resuming are reused in the same order
+        previous_scales = previous_results.get('stress_scales', np.zeros(0))
+        previous_errors = previous_results.get('errors', np.zeros(0))
+        evaluated_scales = []
+        evaluated_errors = []
+        def evaluate(index, stress_scale):
+            if index < len(previous_scales) and np.isclose(previous_scales[index], stress_scale):
+                print('--> Reusing error ' + str(previous_errors[index]) + ' for stress factor ' + str(stress_scale))
+                error = previous_errors[index]
             else:
-                # For further iterations keep updating
-                if errors[i] < errors[current_min_index]:
-                    previous_index = current_min_index
-                    current_min_index = i
-                else:
-                    previous_index = i
+                error = run_scaling_iteration(job_builder, index, stress_scale, stress_scale_counts, cores_per_job,
+                                              error_module, instrumentation)
+                if error is None:
+                    return None
+            evaluated_scales.append(stress_scale)
+            evaluated_errors.append(error)
+            save_checkpoint(checkpoint, stress_scales=evaluated_scales, errors=evaluated_errors)
+            return error
+        minimizer = ScaleMinimizer(evaluate, stress_scale_min, stress_scale_max, stress_scale_counts,
+                                   scale_tolerance, error_tolerance)
+        if not minimizer.minimize():
+            return None, None
+        print('--> Minimum error ' + str(np.min(minimizer.errors)) + ' at stress factor ' +
+              str(minimizer.get_best_scale()))
+        # Only return the evaluated scales and errors
+        stress_scales = np.array(minimizer.scales)
+        errors = np.array(minimizer.errors)
+        save_checkpoint(checkpoint, True, stress_scales=stress_scales, errors=errors)
     else:
         # Feedback message
         print('-> Sweeping stress scale factors')
+        # The jobs which have been completed before resuming are not run again
+        jobs_completed = previous_results.get('jobs_completed', np.zeros(stress_scale_counts, dtype=bool))
         # Simply iterate over the scales which are evenly spaced
         for i in np.arange(0, stress_scale_counts):
             if stress_scale_counts == 1:
@@ -413,18 +816,29 @@ def run_scaling_logic(job_builder, stress_scale_counts, stress_scale_min, stress
             else:
                 stress_scale = stress_scale_min + (i + 0.0) * (stress_scale_max - stress_scale_min) / (
                             stress_scale_counts - 1)
-            # Generate the job
-            print('--> Creating job for stress factor ' + str(stress_scale))
-            jobs[i] = job_builder.create_job(i + 1, stress_scale)
             # Store the stress scale factor
             stress_scales[i] = stress_scale
+            if jobs_completed[i]:
+                print('--> Skipping completed job for stress factor ' + str(stress_scale))
+                continue
+            # Generate the job
+            print('--> Creating job for stress factor ' + str(stress_scale))
+            jobs[i] = create_measured_job(job_builder, i + 1, stress_scale, instrumentation)
         # If jobs must be ran, run the jobs:
         if run_jobs:
-            print('-> Running jobs')
+            print('-> Running jobs (' + str(max_parallel_jobs) + ' in parallel, ' + str(cores_per_job) +
+                  ' cores per job)')
+            scheduler = JobScheduler(max_parallel_jobs, cores_per_job)
             for i in np.arange(0, stress_scale_counts):
-                print('--> Running job ' + str(i + 1) + ' of ' + str(len(jobs)))
-                jobs[i].submit()
-                jobs[i].waitForCompletion()
+                if jobs[i] is not None:
+                    scheduler.add_job(jobs[i])
+            # Store which jobs have been completed as they finish
+            def on_complete(job):
+                if job_completed(job):
+                    jobs_completed[jobs.index(job)] = True
+                    save_checkpoint(checkpoint, stress_scales=stress_scales, jobs_completed=jobs_completed)
+            scheduler.run(on_complete)
+            record_run_times(scheduler, instrumentation)
         # If errors must be calculated, calculate the errors:
         if run_errors:
             print('-> Calculating errors')
@@ -432,70 +846,271 @@ def run_scaling_logic(job_builder, stress_scale_counts, stress_scale_min, stress
                 # Feedback message
                 print('--> Calculating error for job ' + str(i + 1) + ' of ' + str(len(jobs)))
                 # open the ODB
-                odb = abaqus.session.openOdb(jobs[i].name + ".odb", readOnly=True)
-                # Calculate the error (method will be available from the error script)
+                job_name = job_builder.get_job_name(i + 1)
+                odb = open_measured_odb(job_name, instrumentation)
+                # Calculate the error
                 try:
-                    errors[i] = calculate_error(abaqus.session, odb)
+                    errors[i] = instrumentation.measure_job(job_name, 'error', error_module.get('calculate_error'),
+                                                            abaqus.session, odb)
                 except Exception:
                     # If an error script fails, set the error to -1
                     print('---> Error script threw an error during calculation')
                     print(traceback.format_exc())
                     errors[i] = -1
     if run_errors:
+        save_checkpoint(checkpoint, True, stress_scales=stress_scales, errors=errors)
         return stress_scales, errors
     else:
+        save_checkpoint(checkpoint, True, stress_scales=stress_scales)
         return stress_scales, None
 
 
+# Run superposition logic: a single job is run at unit scale, and as the equilibrated stresses are linear in the
+# initial stresses for linear elastic models, the equilibrated stresses for any scale are found by scaling
+def run_superposition_logic(job_builder, stress_scale_counts, stress_scale_min, stress_scale_max, error_script,
+                            iterate, cores_per_job, scale_tolerance, error_tolerance, check_linearity,
+                            instrumentation=None):
+    # Record the time spent on each job, a report is only written if the run is instrumented
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    # Check if error calculation is possible, this requires the error to be calculated from the stresses
+    run_errors = (error_script is not None) and (error_script != '')
+    error_module = UserScript(error_script, 'error_script')
+    if run_errors:
+        try:
+            error_module.load()
+            run_errors = error_module.has_function('calculate_error_from_stresses')
+            if not run_errors:
+                print('-> Function "calculate_error_from_stresses" not defined in error script, '
+                      'errors can not be calculated with superposition')
+        except Exception:
+            # If it fails, turn off error calculation
+            print('-> Error script threw an error')
+            print(traceback.format_exc())
+            run_errors = False
+    if iterate and not run_errors:
+        print('--> Can not iterate without properly defined error script')
+        return None, None
+    # Run the job at unit scale
+    print('-> Running job at unit scale')
+    unit_stresses = run_superposition_job(job_builder, 'Unit', 1.0, cores_per_job, instrumentation)
+    # Evaluate the errors for the scales
+    def evaluate(index, stress_scale):
+        try:
+            error = error_module.get('calculate_error_from_stresses')(scale_stresses(unit_stresses, stress_scale))
+        except Exception:
+            # If an error script fails, abort
+            print('---> Error script threw an error during calculation, aborting')
+            print(traceback.format_exc())
+            return None
+        print('--> Error = ' + str(error) + ' for stress factor ' + str(stress_scale))
+        return error
+    if iterate:
+        print('-> Iterating for minimum error')
+        minimizer = ScaleMinimizer(evaluate, stress_scale_min, stress_scale_max, stress_scale_counts,
+                                   scale_tolerance, error_tolerance)
+        if not minimizer.minimize():
+            return None, None
+        stress_scales = np.array(minimizer.scales)
+        errors = np.array(minimizer.errors)
+    else:
+        print('-> Sweeping stress scale factors')
+        if stress_scale_counts == 1:
+            stress_scales = np.array([stress_scale_min], dtype=np.float64)
+        else:
+            stress_scales = np.linspace(stress_scale_min, stress_scale_max, stress_scale_counts)
+        errors = None
+        if run_errors:
+            errors = np.zeros(stress_scale_counts)
+            for i in np.arange(0, stress_scale_counts):
+                error = evaluate(i, stress_scales[i])
+                if error is None:
+                    return None, None
+                errors[i] = error
+    # Find the best scale
+    if errors is not None:
+        best_scale = stress_scales[np.argmin(errors)]
+        print('--> Minimum error ' + str(np.min(errors)) + ' at stress factor ' + str(best_scale))
+    else:
+        best_scale = stress_scales[len(stress_scales) - 1]
+    # Confirm the linearity by running a job at the best scale
+    if check_linearity:
+        print('-> Checking linearity at stress factor ' + str(best_scale))
+        check_stresses = run_superposition_job(job_builder, 'Check', best_scale, cores_per_job, instrumentation)
+        expected_stresses = scale_stresses(unit_stresses, best_scale)
+        max_difference = 0
+        max_stress = 0
+        for instance_name in check_stresses.keys():
+            difference = np.abs(check_stresses[instance_name][1] - expected_stresses[instance_name][1])
+            max_difference = max(max_difference, difference.max())
+            max_stress = max(max_stress, np.abs(check_stresses[instance_name][1]).max())
+        print('--> Maximum difference with superposition = ' + str(max_difference) +
+              ' (maximum stress = ' + str(max_stress) + ')')
+    return stress_scales, errors
+
+
+# Runs a job for the superposition logic, returns the stresses per instance read from the odb
+def run_superposition_job(job_builder, job_name_index, stress_scale, cores_per_job, instrumentation):
+    print('--> Creating job for stress factor ' + str(stress_scale))
+    job = create_measured_job(job_builder, job_name_index, stress_scale, instrumentation)
+    scheduler = JobScheduler(1, cores_per_job)
+    scheduler.add_job(job)
+    scheduler.run()
+    record_run_times(scheduler, instrumentation)
+    print('--> Reading stresses from odb')
+    odb = open_measured_odb(job.name, instrumentation)
+    return instrumentation.measure_job(job.name, 'odb_read', read_centroid_stresses, odb)
+
+
+# Utility method to scale the stresses per instance as read from an odb
+def scale_stresses(stresses, stress_scale):
+    scaled = {}
+    for instance_name in stresses.keys():
+        labels, values = stresses[instance_name]
+        scaled[instance_name] = (labels, stress_scale*values)
+    return scaled
+
+
+# Runs a single job of the scaling iteration, returns the error or None if the error calculation failed
+def run_scaling_iteration(job_builder, index, stress_scale, job_count, cores_per_job, error_module, instrumentation):
+    # Generate the job
+    print('--> Creating job for stress factor ' + str(stress_scale))
+    job = create_measured_job(job_builder, index + 1, stress_scale, instrumentation)
+    # Run the job
+    print('--> Running job ' + str(index + 1) + ' of at most ' + str(job_count))
+    scheduler = JobScheduler(1, cores_per_job)
+    scheduler.add_job(job)
+    scheduler.run()
+    record_run_times(scheduler, instrumentation)
+    # Calculate the errors
+    print('--> Calculating error for job ' + str(index + 1) + ' of at most ' + str(job_count))
+    # open the ODB
+    odb = open_measured_odb(job.name, instrumentation)
+    # Calculate the error
+    try:
+        error = instrumentation.measure_job(job.name, 'error', error_module.get('calculate_error'), abaqus.session, odb)
+    except Exception:
+        # If an error script fails, abort
+        print('---> Error script threw an error during calculation, aborting')
+        print(traceback.format_exc())
+        return None
+    print('--> Error = ' + str(error))
+    return error
+
+
 # Run substitution logic
-def run_subst_logic(job_builder, max_it, max_dev, max_err, stress_script, error_script):
+def run_subst_logic(job_builder, max_it, max_dev, max_err, stress_module, error_script, write_deviations=False,
+                    acceleration_depth=0, reload_scripts=False, incremental=False, incremental_tolerance=0.0,
+                    stress_pool=None, checkpoint=None, instrumentation=None):
+    # Record the time spent on each job, a report is only written if the run is instrumented
+    if instrumentation is None:
+        instrumentation = Instrumentation()
     deviations = np.zeros(max_it)
     errors = None
+    # Continue after the last completed iteration when resuming from a checkpoint
+    first_iteration = 0
+    if checkpoint is not None and 'iteration' in checkpoint.results:
+        first_iteration = int(checkpoint.results['iteration'])
+        deviations = checkpoint.results['deviations']
+        print('-> Resuming after iteration ' + str(first_iteration))
+    # Accelerate the iteration with Anderson mixing of the previous iterations if requested
+    accelerator = None
+    previous_stresses = None
+    if acceleration_depth > 0:
+        accelerator = AndersonAccelerator(acceleration_depth)
+    # Only evaluate the stress script for the stress sets of which the stresses have changed by more than the tolerance
+    tracker = None
+    if incremental:
+        tracker = StressSetTracker(incremental_tolerance)
     # Check if error calculation is required
     run_errors = (error_script is not None) and (error_script != '')
-    # If error calculation is required run the error script
+    # If error calculation is required run the error script once
+    error_module = UserScript(error_script, 'error_script')
     if run_errors:
         try:
-            execfile(error_script, globals())  # Pass in globals() to load the script's contents to the global dict
+            error_module.load()
             errors = np.zeros(max_it)
+            if checkpoint is not None and 'errors' in checkpoint.results:
+                errors = checkpoint.results['errors']
         except Exception:
             # If it fails, turn off error calculation
             print('-> Error script threw an error')
             print(traceback.format_exc())
             run_errors = False
     # Iterate
-    for i in np.arange(0, max_it):
+    for i in np.arange(first_iteration, max_it):
         # Feedback message
         print('-> Iteration ' + str(i + 1) + ' of ' + str(max_it))
+        # Run the scripts again if requested, for instance if they read data which changes between iterations
+        if reload_scripts and i > first_iteration:
+            print('--> Reloading scripts')
+            try:
+                stress_module.load()
+                if run_errors:
+                    error_module.load()
+                # The reloaded stress script may calculate different stresses
+                if tracker is not None:
+                    tracker.reset()
+                # The worker processes load the stress script again when they are started for the next calculation
+                if stress_pool is not None:
+                    stress_pool.close()
+            except Exception:
+                print('---> Script threw an error while reloading')
+                print(traceback.format_exc())
+                return None, None
         # Calculate the stresses
         print('--> Calculating stresses')
-        mesh_data = define_stresses(job_builder.mesh_data, stress_script)
+        rows = None
+        if tracker is not None:
+            inputs = get_stress_set_stresses(job_builder.mesh_data)
+            rows = tracker.find_changed_rows(inputs)
+            print('---> Evaluating ' + str(sum([len(part_rows) for part_rows in rows if part_rows is not None])) +
+                  ' of ' + str(sum([len(part_inputs) for part_inputs in inputs if part_inputs is not None])) +
+                  ' stress sets')
+        mesh_data = instrumentation.measure('define_stresses', define_stresses, job_builder.mesh_data, stress_module,
+                                            rows, stress_pool)
         if mesh_data is None:
             return None, None
+        # Reuse the stresses of the stress sets which were not evaluated
+        if tracker is not None:
+            define_stress_set_stresses(mesh_data, tracker.update(inputs, get_stress_set_stresses(mesh_data), rows))
+        # Accelerate the stresses
+        if accelerator is not None:
+            stresses = get_stress_set_stresses(mesh_data)
+            if previous_stresses is not None:
+                print('--> Accelerating stresses')
+                stresses = instrumentation.measure('accelerate_stresses', accelerate_stresses, accelerator,
+                                                   previous_stresses, stresses)
+                define_stress_set_stresses(mesh_data, stresses)
+            previous_stresses = stresses
         # Generate the job
         print('--> Creating job ' + str(i + 1) + ' of ' + str(max_it))
-        job = job_builder.create_job(i + 1, 1)
+        job = create_measured_job(job_builder, i + 1, 1, instrumentation)
         # Run the job
         print('--> Running job ' + str(i + 1) + ' of ' + str(max_it))
-        job.submit()
-        job.waitForCompletion()
+        instrumentation.measure_job(job.name, 'solve', run_job, job)
         # open the ODB
-        odb = abaqus.session.openOdb(job.name + ".odb", readOnly=True)
+        odb = open_measured_odb(job.name, instrumentation)
         # Define flag to stop
         converged = False
         # Update stresses from odb
         print('--> Updating stresses from odb')
-        deviations[i] = job_builder.update_stress_from_odb(odb)
+        deviations[i] = instrumentation.measure_job(job.name, 'odb_read', job_builder.update_stress_from_odb, odb)
         print('---> Deviation = ' + str(deviations[i]))
+        if write_deviations:
+            deviation_file = job.name + '_Deviations.npz'
+            job_builder.write_deviations(deviation_file)
+            print('---> Deviations written to "' + deviation_file + '"')
         if deviations[i] < max_dev:
             print('---> Stress deviation criterion reached')
             converged = True
         # Calculate the errors
         if run_errors:
             print('--> Calculating error for job ' + str(i + 1) + ' of ' + str(max_it))
-            # Calculate the error (method will be available from the error script)
+            # Calculate the error
             try:
-                errors[i] = calculate_error(abaqus.session, odb)
+                errors[i] = instrumentation.measure_job(job.name, 'error', error_module.get('calculate_error'),
+                                                        abaqus.session, odb)
                 print('---> Error = ' + str(errors[i]))
                 if errors[i] <= max_err:
                     print '---> Error criterion reached'
@@ -504,6 +1119,11 @@ def run_subst_logic(job_builder, max_it, max_dev, max_err, stress_script, error_
                 # If an error script fails, abort
                 print('---> Error script threw an error during calculation')
                 print(traceback.format_exc())
+        # Store the state after the iteration
+        results = {'iteration': i + 1, 'deviations': deviations}
+        if errors is not None:
+            results['errors'] = errors
+        save_checkpoint(checkpoint, converged or i + 1 >= max_it, **results)
         # If convergence is reached, stop
         if converged:
             print('---> Stopping iteration')
@@ -512,6 +1132,75 @@ def run_subst_logic(job_builder, max_it, max_dev, max_err, stress_script, error_
     return deviations, errors
 
 
+# Creates a job with the job builder, recording the time spent writing its input files and the bytes written
+def create_measured_job(job_builder, job_name_index, stress_scale, instrumentation):
+    job_name = job_builder.get_job_name(job_name_index)
+    bytes_written = job_builder.bytes_written
+    job = instrumentation.measure_job(job_name, 'write', job_builder.create_job, job_name_index, stress_scale)
+    instrumentation.add_job_value(job_name, 'bytes_written', job_builder.bytes_written - bytes_written)
+    return job
+
+
+# Opens the odb of a job, recording the time spent opening it
+def open_measured_odb(job_name, instrumentation):
+    return instrumentation.measure_job(job_name, 'odb_read', abaqus.session.openOdb, job_name + ".odb", readOnly=True)
+
+
+# Records the time each job run by a scheduler took to solve
+def record_run_times(scheduler, instrumentation):
+    for job_name in scheduler.run_times.keys():
+        instrumentation.add_job_value(job_name, 'solve_time', scheduler.run_times[job_name])
+
+
+# Submits a job and waits for its completion
+def run_job(job):
+    job.submit()
+    job.waitForCompletion()
+
+
+# Updates the checkpoint with the results of the last iteration, if there is a checkpoint
+def save_checkpoint(checkpoint, completed=False, **results):
+    if checkpoint is not None:
+        checkpoint.update(completed, **results)
+
+
+# Fetches the stresses of the stress sets of all instances
+def get_stress_set_stresses(mesh_data):
+    stresses = [None] * len(mesh_data)
+    for part_index in np.arange(0, len(mesh_data)):
+        if mesh_data[part_index] is not None:
+            stresses[part_index] = mesh_data[part_index].get_stress_set_stresses()
+    return stresses
+
+
+# Defines the stresses of the stress sets of all instances, rows which are not finite are undefined
+def define_stress_set_stresses(mesh_data, stresses):
+    for part_index in np.arange(0, len(mesh_data)):
+        if mesh_data[part_index] is not None:
+            part_stresses = stresses[part_index]
+            mesh_data[part_index].define_stress_set_stresses(part_stresses,
+                                                             np.all(np.isfinite(part_stresses), axis=1))
+
+
+# Calculates the next stresses of all instances with the accelerator, from the stresses of the previous iteration as
+# inputs and the (substituted) stresses resulting from them. Stresses which are undefined in either are not accelerated
+def accelerate_stresses(accelerator, inputs, outputs):
+    parts = [part_index for part_index in np.arange(0, len(outputs)) if outputs[part_index] is not None]
+    x = np.concatenate([inputs[part_index] for part_index in parts])
+    g = np.concatenate([outputs[part_index] for part_index in parts])
+    defined = np.isfinite(x) & np.isfinite(g)
+    x_next = accelerator.accelerate(np.where(defined, x, 0), np.where(defined, g, 0))
+    x_next = np.where(defined, x_next, g)
+    # Split the stresses per instance again
+    accelerated = [None] * len(outputs)
+    start = 0
+    for part_index in parts:
+        end = start + len(outputs[part_index])
+        accelerated[part_index] = x_next[start:end]
+        start = end
+    return accelerated
+
+
 # Writes stress scales and errors to file
 def output_scales_and_error(stress_scales, errors):
     if stress_scales is not None:
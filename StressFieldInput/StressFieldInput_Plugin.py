@@ -68,6 +68,39 @@ class Plugin(abaqusGui.AFXForm):
         self.kw_iterate = abaqusGui.AFXBoolKeyword(
             self.cmd_scaling, 'iterate', abaqusGui.AFXBoolKeyword.TRUE_FALSE, True, False
         )
+        self.kw_includes_scaling = abaqusGui.AFXBoolKeyword(
+            self.cmd_scaling, 'use_includes', abaqusGui.AFXBoolKeyword.TRUE_FALSE, True, False
+        )
+        self.kw_parallel_jobs = abaqusGui.AFXIntKeyword(
+            self.cmd_scaling, 'max_parallel_jobs', True, 1, False
+        )
+        self.kw_cores_per_job = abaqusGui.AFXIntKeyword(
+            self.cmd_scaling, 'cores_per_job', True, 1, False
+        )
+        self.kw_scale_tol = abaqusGui.AFXFloatKeyword(
+            self.cmd_scaling, 'scale_tolerance', True, 0.0
+        )
+        self.kw_error_tol = abaqusGui.AFXFloatKeyword(
+            self.cmd_scaling, 'error_tolerance', True, 0.0
+        )
+        self.kw_superposition = abaqusGui.AFXBoolKeyword(
+            self.cmd_scaling, 'superposition', abaqusGui.AFXBoolKeyword.TRUE_FALSE, True, False
+        )
+        self.kw_check_linearity = abaqusGui.AFXBoolKeyword(
+            self.cmd_scaling, 'check_linearity', abaqusGui.AFXBoolKeyword.TRUE_FALSE, True, False
+        )
+        self.kw_merge_sets = abaqusGui.AFXBoolKeyword(
+            self.cmd_scaling, 'merge_sets', abaqusGui.AFXBoolKeyword.TRUE_FALSE, True, False
+        )
+        self.kw_merge_tol = abaqusGui.AFXFloatKeyword(
+            self.cmd_scaling, 'merge_tolerance', True, 0.0
+        )
+        self.kw_precision_scaling = abaqusGui.AFXIntKeyword(
+            self.cmd_scaling, 'stress_precision', True, 12, False
+        )
+        self.kw_processes_scaling = abaqusGui.AFXIntKeyword(
+            self.cmd_scaling, 'stress_processes', True, 1, False
+        )
         # Define the keywords for the substitution command
         self.kw_def_job_substitution = abaqusGui.AFXStringKeyword(
             self.cmd_substitution, 'default_job', True, ''
@@ -87,6 +120,30 @@ class Plugin(abaqusGui.AFXForm):
         self.kw_error_script_substitution = abaqusGui.AFXStringKeyword(
             self.cmd_substitution, 'error_script', True, ''
         )
+        self.kw_includes_substitution = abaqusGui.AFXBoolKeyword(
+            self.cmd_substitution, 'use_includes', abaqusGui.AFXBoolKeyword.TRUE_FALSE, True, False
+        )
+        self.kw_write_deviations = abaqusGui.AFXBoolKeyword(
+            self.cmd_substitution, 'write_deviations', abaqusGui.AFXBoolKeyword.TRUE_FALSE, True, False
+        )
+        self.kw_acceleration_depth = abaqusGui.AFXIntKeyword(
+            self.cmd_substitution, 'acceleration_depth', True, 0, False
+        )
+        self.kw_precision_substitution = abaqusGui.AFXIntKeyword(
+            self.cmd_substitution, 'stress_precision', True, 12, False
+        )
+        self.kw_processes_substitution = abaqusGui.AFXIntKeyword(
+            self.cmd_substitution, 'stress_processes', True, 1, False
+        )
+        self.kw_reload_scripts = abaqusGui.AFXBoolKeyword(
+            self.cmd_substitution, 'reload_scripts', abaqusGui.AFXBoolKeyword.TRUE_FALSE, True, False
+        )
+        self.kw_incremental = abaqusGui.AFXBoolKeyword(
+            self.cmd_substitution, 'incremental', abaqusGui.AFXBoolKeyword.TRUE_FALSE, True, False
+        )
+        self.kw_incremental_tol = abaqusGui.AFXFloatKeyword(
+            self.cmd_substitution, 'incremental_tolerance', True, 0.0
+        )
         # Add callback to the job keyword
         self.kw_def_job.add_callback(self.update_default_job)
 
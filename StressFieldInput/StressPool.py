@@ -0,0 +1,103 @@
+# coding=utf-8
+
+import multiprocessing
+import os
+import traceback
+import numpy as np
+from UserScript import UserScript
+
+# Stress script loaded in a worker process, set once when the worker starts
+worker_stress_module = None
+# Traceback of the error thrown by the stress script while it was loaded in a worker process, if any
+worker_load_error = None
+
+
+# Class to calculate the stresses of stress sets with the "calculate_stress" function of the stress script in a pool of
+# worker processes. Each worker loads the stress script once when it starts, and the stress sets are split into chunks
+# which are evaluated by the workers, the results are returned in the order of the stress sets
+class StressPool:
+    # Number of chunks per worker process, more chunks balance the load better when some stress sets are more expensive
+    CHUNKS_PER_PROCESS = 4
+
+    def __init__(self, file_name, processes=1):
+        # Define fields
+        self.file_name = file_name
+        self.processes = processes
+        self.pool = None
+        self.failed = False
+
+    # Starts the worker processes if they are not running yet, returns True if they are running. Returns False if only
+    # one process is requested, or if the worker processes are not supported or failed before
+    def start(self):
+        if self.pool is not None:
+            return True
+        if self.processes <= 1 or self.failed:
+            return False
+        # The workers are forked, so that they do not have to import Abaqus again
+        if not hasattr(os, 'fork'):
+            print('---> Worker processes are not supported on this platform, calculating the stresses in this process')
+            self.failed = True
+            return False
+        try:
+            self.pool = multiprocessing.Pool(self.processes, initializer=load_worker_stress_script,
+                                             initargs=(self.file_name,))
+        except Exception:
+            print('---> Worker processes could not be started, calculating the stresses in this process')
+            print(traceback.format_exc())
+            self.failed = True
+            return False
+        print('---> Started ' + str(self.processes) + ' worker processes')
+        return True
+
+    # Calculates the stresses for a list of (instance name, x, y, z, previous stress) tuples, returns a list of
+    # (stress, error) tuples in the same order, where the error is the traceback of the error thrown by the stress
+    # script, or None. Returns None if the worker processes failed, in which case they are not used again
+    def evaluate(self, stress_sets):
+        if not self.start():
+            return None
+        chunk_count = min(len(stress_sets), self.processes*StressPool.CHUNKS_PER_PROCESS)
+        bounds = np.linspace(0, len(stress_sets), chunk_count + 1).astype(np.int64)
+        chunks = [stress_sets[bounds[index]:bounds[index + 1]] for index in np.arange(0, chunk_count)]
+        try:
+            # The chunks are returned in order, regardless of which worker evaluated them
+            results = self.pool.map(calculate_chunk_stresses, chunks)
+        except Exception:
+            print('---> Worker processes failed, calculating the stresses in this process instead')
+            print(traceback.format_exc())
+            self.failed = True
+            self.close()
+            return None
+        return [result for chunk_results in results for result in chunk_results]
+
+    # Stops the worker processes, they are started again with a freshly loaded stress script when needed
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+# Method run by each worker process when it starts to load the stress script, errors are stored to be reported by the
+# first chunk, as a worker which fails to start would be restarted by the pool indefinitely
+def load_worker_stress_script(file_name):
+    global worker_stress_module, worker_load_error
+    worker_stress_module = UserScript(file_name, 'stress_script')
+    try:
+        worker_stress_module.load()
+        worker_load_error = None
+    except Exception:
+        worker_load_error = traceback.format_exc()
+
+
+# Method run by the worker processes to calculate the stresses of a chunk of stress sets
+def calculate_chunk_stresses(chunk):
+    if worker_load_error is not None:
+        raise RuntimeError('Stress script threw an error in a worker process:\n' + worker_load_error)
+    calculate_stress = worker_stress_module.get('calculate_stress')
+    results = []
+    for instance_name, x, y, z, prev_stress in chunk:
+        try:
+            results.append((calculate_stress(instance_name, x, y, z, prev_stress), None))
+        except Exception:
+            results.append((None, traceback.format_exc()))
+    return results
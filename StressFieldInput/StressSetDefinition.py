@@ -1,5 +1,7 @@
 # coding=utf-8
 
+import numpy as np
+
 
 # Abstract class to define stress definitions
 class StressSetDefinition:
@@ -15,6 +17,10 @@ class StressSetDefinition:
     def get_elements(self):
         pass
 
+    # Fetches the labels of the elements in the stress set as an array
+    def get_element_labels(self):
+        return np.array([element.get_label() for element in self.get_elements()], dtype=np.int64)
+
     def get_x(self):
         pass
 
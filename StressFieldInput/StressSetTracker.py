@@ -0,0 +1,56 @@
+# coding=utf-8
+
+import numpy as np
+from JobBuilder import compute_deviations
+
+
+# Class to track how much the input stresses of each stress set have changed since the stress script was last evaluated
+# for it. The evaluation is skipped for the stress sets of which the input stresses have not deviated by more than the
+# tolerance, and the output of their last evaluation is reused instead
+class StressSetTracker:
+    def __init__(self, tolerance=0.0):
+        # Define fields
+        self.tolerance = tolerance
+        # Input stresses at the last evaluation and output stresses of the last evaluation, per instance
+        self.inputs = None
+        self.outputs = None
+
+    # Finds the rows of the stress sets of each instance which have to be evaluated for the given input stresses, all
+    # rows are evaluated the first time
+    def find_changed_rows(self, inputs):
+        rows = [None] * len(inputs)
+        for part_index in np.arange(0, len(inputs)):
+            if inputs[part_index] is None:
+                continue
+            if self.inputs is None:
+                rows[part_index] = np.arange(0, len(inputs[part_index]))
+            else:
+                # Stress sets with undefined stresses have no deviation, and are always evaluated
+                deviations = compute_deviations(self.inputs[part_index], inputs[part_index])
+                rows[part_index] = np.nonzero(~(deviations <= self.tolerance))[0]
+        return rows
+
+    # Stores the input and output stresses of the evaluated rows, returns the output stresses of all stress sets, with
+    # the output of the last evaluation for the rows which were not evaluated
+    def update(self, inputs, outputs, rows):
+        if self.inputs is None:
+            self.inputs = [None] * len(inputs)
+            self.outputs = [None] * len(outputs)
+        merged = [None] * len(outputs)
+        for part_index in np.arange(0, len(outputs)):
+            if outputs[part_index] is None:
+                continue
+            if self.inputs[part_index] is None:
+                self.inputs[part_index] = inputs[part_index].copy()
+                self.outputs[part_index] = outputs[part_index].copy()
+            else:
+                part_rows = rows[part_index]
+                self.inputs[part_index][part_rows] = inputs[part_index][part_rows]
+                self.outputs[part_index][part_rows] = outputs[part_index][part_rows]
+            merged[part_index] = self.outputs[part_index].copy()
+        return merged
+
+    # Clears the stored stresses, all stress sets will be evaluated again
+    def reset(self):
+        self.inputs = None
+        self.outputs = None
@@ -0,0 +1,39 @@
+# coding=utf-8
+
+
+# Class to compile and run a user script (e.g. the stress or error script) into its own namespace. The script is run once
+# when it is loaded, after which its functions can be called repeatedly without running the code at the top level of
+# the script again, and without adding the contents of the script to the namespace of the kernel
+class UserScript:
+    def __init__(self, file_name, name):
+        # Define fields
+        self.file_name = file_name
+        self.name = name
+        self.namespace = None
+
+    # Compiles and runs the script into a new namespace, also to reload a script which has already been loaded. Errors
+    # thrown by the script are not caught, and leave the previously loaded namespace in place
+    def load(self):
+        fid = open(self.file_name, 'rU')
+        source = fid.read()
+        fid.close()
+        code = compile(source, self.file_name, 'exec')
+        namespace = {'__name__': self.name, '__file__': self.file_name}
+        exec(code, namespace)
+        self.namespace = namespace
+
+    # Checks if the script has been loaded
+    def is_loaded(self):
+        return self.namespace is not None
+
+    # Checks if the script defines a variable with the given name
+    def has_variable(self, name):
+        return self.is_loaded() and name in self.namespace
+
+    # Checks if the script defines a callable with the given name
+    def has_function(self, name):
+        return self.has_variable(name) and callable(self.namespace[name])
+
+    # Fetches a variable or function defined by the script
+    def get(self, name):
+        return self.namespace[name]
@@ -0,0 +1,104 @@
+# Script to check that the acceleration of the substitution approach converges at least as fast as plain substitution,
+# without Abaqus, using the stand-in abaqus module in this directory:
+#   python Acceleration_Check.py [--iterations 60] [--depths 3 5] [--min-speedup 100]
+# The equilibration step of each job is replaced by a symmetric contractive linear map which couples all stress
+# components of all points, after which the known stress components are substituted again, as a stress script would do.
+# The script exits with status 1 if an accelerated run does not end with a deviation which is at least the given factor
+# smaller than that of the plain run
+import argparse
+import os
+import sys
+
+# Make sure the stand-in abaqus module in this directory is found before the plugin directory
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIRECTORY = os.path.join(os.path.dirname(BENCHMARK_DIRECTORY), 'StressFieldInput')
+sys.path.insert(0, PLUGIN_DIRECTORY)
+sys.path.insert(0, BENCHMARK_DIRECTORY)
+
+import numpy as np
+from AndersonAccelerator import AndersonAccelerator
+from JobBuilder import compute_deviations
+from StressFieldInput_Kernel import accelerate_stresses
+
+
+# Main method which runs the plain and accelerated iterations and compares their final deviations
+def run_check(iterations, depths, point_count, seed, min_speedup):
+    # Feedback message
+    print('=== ACCELERATION CHECK ===')
+    solver = FakeSolver(point_count, seed)
+    plain = run_iterations(solver, iterations, 0)
+    print('-> Plain substitution: deviation = ' + str(plain))
+    passed = True
+    for depth in depths:
+        accelerated = run_iterations(solver, iterations, depth)
+        print('-> Acceleration depth ' + str(depth) + ': deviation = ' + str(accelerated))
+        if not accelerated*min_speedup <= plain:
+            print('--> Accelerated run did not converge ' + str(min_speedup) + ' times further than plain substitution')
+            passed = False
+    return passed
+
+
+# Runs the substitution iterations in the same way as the kernel, returns the deviation of the last iteration
+def run_iterations(solver, iterations, depth):
+    accelerator = None
+    if depth > 0:
+        accelerator = AndersonAccelerator(depth)
+    previous_stresses = None
+    stresses = solver.substitute(np.zeros((solver.point_count, 6)))
+    deviation = None
+    for i in np.arange(0, iterations):
+        # Equilibrate and substitute the known stresses again
+        outputs = solver.equilibrate(stresses)
+        deviation = compute_deviations(stresses, outputs).max()
+        substituted = solver.substitute(outputs)
+        # Accelerate the stresses with the stresses of the previous iterations
+        if accelerator is not None and previous_stresses is not None:
+            substituted = accelerate_stresses(accelerator, [previous_stresses], [substituted])[0]
+        previous_stresses = substituted
+        stresses = substituted
+    return deviation
+
+
+# Class to stand in for the equilibration step of a job: a contractive linear map of all stress components, which is
+# symmetric as the stiffness of an elastic model
+class FakeSolver:
+    def __init__(self, point_count, seed):
+        # Define fields
+        self.point_count = point_count
+        random = np.random.RandomState(seed)
+        size = 6*point_count
+        # Symmetric map with eigenvalues up to 0.95, so that plain substitution converges slowly
+        basis = np.linalg.qr(random.standard_normal((size, size)))[0]
+        self.matrix = basis.dot(np.diag(random.uniform(0.0, 0.95, size))).dot(basis.T)
+        self.offset = 100.0*random.standard_normal(size)
+        # The first two stress components of every other point are known
+        self.known = np.zeros((point_count, 6), dtype=bool)
+        self.known[::2, 0:2] = True
+        # The known stresses are taken from the equilibrium state, so that the deviation converges to 0
+        self.target = np.linalg.solve(np.eye(size) - self.matrix, self.offset).reshape((point_count, 6))
+
+    # Relaxes the stresses
+    def equilibrate(self, stresses):
+        return (self.matrix.dot(stresses.ravel()) + self.offset).reshape(stresses.shape)
+
+    # Substitutes the known stress components
+    def substitute(self, stresses):
+        return np.where(self.known, self.target, stresses)
+
+
+# Parses the command line arguments
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description='Checks the convergence of the accelerated substitution approach')
+    parser.add_argument('--iterations', type=int, default=60, help='number of iterations of each run')
+    parser.add_argument('--depths', type=int, nargs='+', default=[3, 5], help='acceleration depths to check')
+    parser.add_argument('--points', type=int, default=50, help='number of stress points')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random fake solver')
+    parser.add_argument('--min-speedup', type=float, default=100.0,
+                        help='factor by which the accelerated deviation must be smaller than the plain deviation')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_arguments(sys.argv[1:])
+    if not run_check(args.iterations, args.depths, args.points, args.seed, args.min_speedup):
+        sys.exit(1)
@@ -0,0 +1,17 @@
+# import numpy
+import numpy as npy
+
+
+# Stress script for the benchmark, applying a stress state which varies sinusoidally in x, y and z.
+# Both the single point and the batch version are defined, the plugin uses the batch version
+
+
+# Stress at a single point
+def calculate_stress(part, x, y, z, prev_stress):
+    return [100.0*npy.sin(x), 100.0*npy.sin(y), 100.0*npy.sin(z), 10.0*npy.cos(x), 10.0*npy.cos(y), 10.0*npy.cos(z)]
+
+
+# Stresses at arrays of points
+def calculate_stress_batch(part, xs, ys, zs, prev_stresses):
+    return npy.column_stack((100.0*npy.sin(xs), 100.0*npy.sin(ys), 100.0*npy.sin(zs),
+                             10.0*npy.cos(xs), 10.0*npy.cos(ys), 10.0*npy.cos(zs)))
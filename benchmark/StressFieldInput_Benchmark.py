@@ -0,0 +1,250 @@
+# Script to benchmark the plugin kernel on synthetic meshes without Abaqus, using the stand-in abaqus module in this
+# directory:
+#   python StressFieldInput_Benchmark.py [--sizes 10000 100000 ...] [--repeat 3] [--output report.json]
+# For each size, a box of hexahedral elements is meshed, and the stages of the kernel are timed. The timings are written
+# to a json report, so that runs on different revisions can be compared
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+# Make sure the stand-in abaqus module in this directory is found before the plugin directory
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIRECTORY = os.path.join(os.path.dirname(BENCHMARK_DIRECTORY), 'StressFieldInput')
+sys.path.insert(0, PLUGIN_DIRECTORY)
+sys.path.insert(0, BENCHMARK_DIRECTORY)
+
+import numpy as np
+import abaqus
+import StressFieldInput_Kernel
+from Instrumentation import get_peak_memory
+from JobBuilder import JobBuilder
+from UserScript import UserScript
+
+# Name of the default job of the synthetic models
+DEFAULT_JOB = 'Job-1'
+# Kernel stages which are timed, in order
+STAGES = ['characterize_mesh', 'characterize_mesh_cached', 'define_stresses', 'write_default_input',
+          'JobBuilder.__init__', 'create_job', 'update_stress_from_odb']
+
+
+# Main method which runs the benchmark for all sizes and writes the report
+def run_benchmark(sizes, repeat, instance_count, stress_script, output_file, work_directory):
+    # Feedback message
+    print('=== STRESS INPUT BENCHMARK ===')
+    report = {
+        'date': datetime.datetime.now().isoformat(),
+        'revision': get_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'instances': instance_count,
+        'stress_script': os.path.basename(stress_script),
+        'results': [],
+    }
+    current_directory = os.getcwd()
+    os.chdir(work_directory)
+    try:
+        for size in sizes:
+            result = run_size(size, repeat, instance_count, stress_script)
+            if result is None:
+                return False
+            report['results'].append(result)
+            # Write the report after each size, so that the smaller sizes are kept if a larger one runs out of memory
+            write_report(report, output_file)
+    finally:
+        os.chdir(current_directory)
+    print('> Report written to "' + output_file + '"')
+    return True
+
+
+# Runs the benchmark for a single size, returns the timings or None if the kernel failed
+def run_size(size, repeat, instance_count, stress_script):
+    print('> Benchmarking ' + str(size) + ' elements')
+    # Load the stress script, as the kernel does when checking it
+    stress_module = UserScript(stress_script, 'stress_script')
+    stress_module.load()
+    # Build the synthetic model
+    print('-> Meshing')
+    model = create_model(size, instance_count)
+    instances = model.rootAssembly.allInstances
+    node_count = sum([len(instances[key].nodes) for key in instances.keys()])
+    element_count = sum([len(instances[key].elements) for key in instances.keys()])
+    timings = dict((stage, []) for stage in STAGES)
+    deck_size = 0
+    for run in np.arange(0, repeat):
+        print('-> Run ' + str(run + 1) + ' of ' + str(repeat))
+        remove_files()
+        job = abaqus.mdb.jobs[DEFAULT_JOB]
+        # Characterize the mesh, the second time it is read from the cache
+        start = timeit.default_timer()
+        mesh_data = StressFieldInput_Kernel.characterize_mesh(DEFAULT_JOB, stress_module)
+        timings['characterize_mesh'].append(timeit.default_timer() - start)
+        start = timeit.default_timer()
+        mesh_data = StressFieldInput_Kernel.characterize_mesh(DEFAULT_JOB, stress_module)
+        timings['characterize_mesh_cached'].append(timeit.default_timer() - start)
+        if mesh_data is None:
+            print('--> Mesh characterization failed, aborting')
+            return None
+        # Define the stresses
+        start = timeit.default_timer()
+        mesh_data = StressFieldInput_Kernel.define_stresses(mesh_data, stress_module)
+        timings['define_stresses'].append(timeit.default_timer() - start)
+        if mesh_data is None:
+            print('--> Stress definition failed, aborting')
+            return None
+        # Build the job builder, the time the stand-in spends writing the default input is reported separately
+        write_time = job.write_time
+        start = timeit.default_timer()
+        job_builder = JobBuilder(DEFAULT_JOB, mesh_data)
+        elapsed = timeit.default_timer() - start
+        write_time = job.write_time - write_time
+        timings['write_default_input'].append(write_time)
+        timings['JobBuilder.__init__'].append(elapsed - write_time)
+        if not job_builder.is_valid():
+            print('--> Job builder is not valid, aborting')
+            return None
+        # Create a job
+        start = timeit.default_timer()
+        stress_job = job_builder.create_job(1, 1.0)
+        timings['create_job'].append(timeit.default_timer() - start)
+        deck_size = os.path.getsize(stress_job.inputFileName)
+        # Update the stresses from an output database
+        odb = create_odb(stress_job.name + '.odb', model)
+        start = timeit.default_timer()
+        job_builder.update_stress_from_odb(odb)
+        timings['update_stress_from_odb'].append(timeit.default_timer() - start)
+    remove_files()
+    # Summarize the timings
+    stages = {}
+    for stage in STAGES:
+        stages[stage] = {
+            'times': timings[stage],
+            'best': min(timings[stage]),
+            'mean': sum(timings[stage])/len(timings[stage]),
+        }
+        print('--> ' + stage + ': ' + ('%.3f' % stages[stage]['best']) + ' s')
+    return {
+        'size': size,
+        'nodes': node_count,
+        'elements': element_count,
+        'deck_bytes': deck_size,
+        'peak_memory_bytes': get_peak_memory(),
+        'stages': stages,
+    }
+
+
+# Creates a model with a box of hexahedral elements of approximately the given size, split over a number of instances
+def create_model(size, instance_count):
+    abaqus.mdb.clear()
+    model = abaqus.mdb.Model('Model-1')
+    instance_size = max(1, int(round(float(size)/instance_count)))
+    for instance_index in np.arange(0, instance_count):
+        part = model.Part('Part-' + str(instance_index + 1))
+        coordinates, connectivity = create_box_mesh(instance_size)
+        # Offset the instances so that they do not overlap
+        coordinates[:, 0] = coordinates[:, 0] + instance_index*(coordinates[:, 0].max() + 1.0)
+        model.rootAssembly.Instance(part.name + '-1', part, coordinates, connectivity)
+    abaqus.mdb.Job(DEFAULT_JOB, model)
+    return model
+
+
+# Utility method to mesh a box with approximately the given number of unit hexahedral elements, returns the node
+# coordinates and the element connectivity
+def create_box_mesh(size):
+    nx = max(1, int(np.floor(size**(1.0/3))))
+    ny = nx
+    nz = max(1, int(round(float(size)/(nx*ny))))
+    # Nodes are numbered along x first, then y, then z
+    k, j, i = np.mgrid[0:nz + 1, 0:ny + 1, 0:nx + 1]
+    coordinates = np.column_stack((i.ravel(), j.ravel(), k.ravel())).astype(np.float64)
+    # Index of the first node of each element
+    k, j, i = np.mgrid[0:nz, 0:ny, 0:nx]
+    first = (i + j*(nx + 1) + k*(nx + 1)*(ny + 1)).ravel()
+    dx = 1
+    dy = nx + 1
+    dz = (nx + 1)*(ny + 1)
+    offsets = np.array([0, dx, dx + dy, dy, dz, dx + dz, dx + dy + dz, dy + dz], dtype=np.int64)
+    connectivity = first[:, np.newaxis].astype(np.int64) + offsets[np.newaxis, :]
+    return coordinates, connectivity
+
+
+# Creates an output database with stresses for all elements of a model and registers it with the session
+def create_odb(name, model):
+    random = np.random.RandomState(0)
+    instances = model.rootAssembly.allInstances
+    stresses = {}
+    for instance_key in instances.keys():
+        elements = instances[instance_key].elements
+        values = (100.0*random.standard_normal((len(elements), 6))).astype(np.float32)
+        stresses[instance_key.upper()] = (elements.labels.astype(np.int32), values)
+    odb = abaqus.Odb(name, stresses)
+    abaqus.session.odbs[name] = odb
+    return odb
+
+
+# Removes the files written by the kernel in the working directory
+def remove_files():
+    for file_name in os.listdir('.'):
+        if file_name.startswith(DEFAULT_JOB):
+            os.remove(file_name)
+    abaqus.session.odbs.clear()
+
+
+# Writes the report to a json file
+def write_report(report, output_file):
+    fid = open(output_file, 'w')
+    json.dump(report, fid, indent=2, sort_keys=True)
+    fid.close()
+
+
+# Fetches the git revision of the plugin, returns None if it is not available
+def get_revision():
+    try:
+        revision = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIRECTORY,
+                                           stderr=open(os.devnull, 'w'))
+        return revision.strip().decode('utf-8')
+    except Exception:
+        return None
+
+
+# Parses the command line arguments
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description='Benchmarks the stress field input kernel on synthetic meshes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000, 10000000],
+                        help='approximate numbers of elements of the synthetic meshes')
+    parser.add_argument('--repeat', type=int, default=1, help='number of runs for each size')
+    parser.add_argument('--instances', type=int, default=1, help='number of instances the elements are split over')
+    parser.add_argument('--stress-script', default=os.path.join(BENCHMARK_DIRECTORY, 'Benchmark_Stress_Script.py'),
+                        help='stress script used to characterize the mesh and define the stresses')
+    parser.add_argument('--output', default='StressFieldInput_Benchmark.json', help='json report file')
+    parser.add_argument('--work-directory', default=None,
+                        help='directory for the files written by the kernel, a temporary directory by default')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_arguments(sys.argv[1:])
+    if args.repeat < 1 or args.instances < 1 or min(args.sizes) < 1:
+        print('Sizes, repeat and instances should be at least 1')
+        sys.exit(2)
+    work_directory = args.work_directory
+    if work_directory is None:
+        work_directory = tempfile.mkdtemp(prefix='StressFieldInput_Benchmark_')
+    elif not os.path.isdir(work_directory):
+        os.makedirs(work_directory)
+    try:
+        success = run_benchmark(args.sizes, args.repeat, args.instances, os.path.abspath(args.stress_script),
+                                os.path.abspath(args.output), work_directory)
+    finally:
+        if args.work_directory is None:
+            shutil.rmtree(work_directory)
+    if not success:
+        sys.exit(1)
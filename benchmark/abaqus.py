@@ -0,0 +1,322 @@
+# coding=utf-8
+
+# Stand-in for the parts of the abaqus module which are used by the plugin kernel, so that the kernel can be run and
+# timed without a licensed Abaqus session. The mesh of an instance is stored in arrays, the node and element objects are
+# only created when they are accessed, as Abaqus does
+import time
+import numpy as np
+from abaqusConstants import *
+
+# Labels of the components of the stress output of solid elements
+STRESS_COMPONENT_LABELS = ('S11', 'S22', 'S33', 'S12', 'S13', 'S23')
+
+
+# Class representing a mesh node
+class MeshNode:
+    def __init__(self, label, coordinates):
+        self.label = label
+        self.coordinates = coordinates
+
+
+# Class representing a mesh element, the connectivity holds the indices of the nodes in the instance
+class MeshElement:
+    def __init__(self, instance, label, connectivity):
+        self.instance = instance
+        self.label = label
+        self.connectivity = connectivity
+
+    # Fetches the nodes of the element
+    def getNodes(self):
+        return [self.instance.nodes[index] for index in self.connectivity]
+
+
+# Class representing the nodes of an instance as a sequence
+class MeshNodeArray:
+    # Number of nodes which are converted from the arrays at once when iterating
+    CHUNK_SIZE = 65536
+
+    def __init__(self, labels, coordinates):
+        self.labels = labels
+        self.coordinates = coordinates
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, index):
+        return MeshNode(int(self.labels[index]), tuple(self.coordinates[index].tolist()))
+
+    def __iter__(self):
+        for start in np.arange(0, len(self.labels), self.CHUNK_SIZE):
+            end = start + self.CHUNK_SIZE
+            for label, coordinates in zip(self.labels[start:end].tolist(), self.coordinates[start:end].tolist()):
+                yield MeshNode(label, tuple(coordinates))
+
+
+# Class representing the elements of an instance as a sequence
+class MeshElementArray:
+    # Number of elements which are converted from the arrays at once when iterating
+    CHUNK_SIZE = 65536
+
+    def __init__(self, instance, labels, connectivity):
+        self.instance = instance
+        self.labels = labels
+        self.connectivity = connectivity
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, index):
+        return MeshElement(self.instance, int(self.labels[index]), tuple(self.connectivity[index].tolist()))
+
+    def __iter__(self):
+        for start in np.arange(0, len(self.labels), self.CHUNK_SIZE):
+            end = start + self.CHUNK_SIZE
+            for label, connectivity in zip(self.labels[start:end].tolist(), self.connectivity[start:end].tolist()):
+                yield MeshElement(self.instance, label, tuple(connectivity))
+
+
+# Class representing a part
+class Part:
+    def __init__(self, name, element_type='C3D8R'):
+        self.name = name
+        self.element_type = element_type
+
+
+# Class representing a part instance with its mesh, the connectivity holds the indices of the nodes of each element
+class PartInstance:
+    def __init__(self, name, part, node_coordinates, element_connectivity):
+        self.name = name
+        self.part = part
+        self.nodes = MeshNodeArray(np.arange(1, len(node_coordinates) + 1), node_coordinates)
+        self.elements = MeshElementArray(self, np.arange(1, len(element_connectivity) + 1), element_connectivity)
+
+
+# Class representing the assembly of a model
+class Assembly:
+    def __init__(self):
+        self.allInstances = {}
+        self.instances = self.allInstances
+
+    # Adds an instance of a part with its mesh to the assembly
+    def Instance(self, name, part, node_coordinates, element_connectivity):
+        instance = PartInstance(name, part, node_coordinates, element_connectivity)
+        self.allInstances[name] = instance
+        return instance
+
+
+# Class representing a model
+class Model:
+    def __init__(self, name):
+        self.name = name
+        self.parts = {}
+        self.rootAssembly = Assembly()
+
+    # Adds a part to the model
+    def Part(self, name, element_type='C3D8R'):
+        part = Part(name, element_type)
+        self.parts[name] = part
+        return part
+
+
+# Class representing a job, the time spent writing input files is tracked so that it can be separated from the time
+# spent in the kernel
+class Job:
+    def __init__(self, name, model=None, inputFileName=None):
+        self.name = name
+        self.model = model
+        self.inputFileName = inputFileName
+        self.status = None
+        self.numCpus = 1
+        self.numDomains = 1
+        self.duration = 0.0
+        self.end_time = 0.0
+        self.write_time = 0.0
+
+    # Sets the values of job attributes
+    def setValues(self, **kwargs):
+        for key in kwargs.keys():
+            setattr(self, key, kwargs[key])
+
+    # Writes the input file of the model
+    def writeInput(self):
+        start = time.time()
+        write_input_file(self.model, self.name + '.inp')
+        self.write_time = self.write_time + time.time() - start
+
+    # Submits the job, which completes after its duration without running an analysis
+    def submit(self):
+        self.status = SUBMITTED
+        self.end_time = time.time() + self.duration
+
+    # Waits until the job has completed. As in Abaqus CAE while a script is running, the status of the job is not
+    # updated in the background, only when waiting for its completion
+    def waitForCompletion(self):
+        remaining = self.end_time - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+        self.status = COMPLETED
+
+
+# Class representing the model database
+class Mdb:
+    def __init__(self):
+        self.models = {}
+        self.jobs = {}
+
+    # Adds a model to the model database
+    def Model(self, name):
+        model = Model(name)
+        self.models[name] = model
+        return model
+
+    # Adds a job for a model to the model database
+    def Job(self, name, model):
+        job = Job(name, model=model)
+        self.jobs[name] = job
+        return job
+
+    # Adds a job for an input file to the model database
+    def JobFromInputFile(self, name, inputFileName, **kwargs):
+        job = Job(name, inputFileName=inputFileName)
+        job.setValues(**kwargs)
+        self.jobs[name] = job
+        return job
+
+    # Removes all models and jobs
+    def clear(self):
+        self.models.clear()
+        self.jobs.clear()
+
+
+# Class representing the instance of a block of output data
+class OdbInstance:
+    def __init__(self, name):
+        self.name = name
+
+
+# Class representing a block of output data for the elements of an instance
+class FieldBulkData:
+    def __init__(self, instance, element_labels, data, component_labels=STRESS_COMPONENT_LABELS):
+        self.instance = instance
+        self.elementLabels = element_labels
+        self.data = data
+        self.componentLabels = component_labels
+
+
+# Class representing a single output value
+class FieldValue:
+    def __init__(self, instance, element_label, data):
+        self.instance = instance
+        self.elementLabel = element_label
+        self.data = data
+
+
+# Class representing a field output, the blocks of output data are shared with its subsets
+class FieldOutput:
+    def __init__(self, name, blocks, component_labels=STRESS_COMPONENT_LABELS):
+        self.name = name
+        self.bulkDataBlocks = blocks
+        self.componentLabels = component_labels
+
+    # Fetches a subset of the field output, the stand-in only stores output at the element centroids
+    def getSubset(self, position=CENTROID, region=None):
+        return self
+
+    # Fetches the output values one by one
+    @property
+    def values(self):
+        values = []
+        for block in self.bulkDataBlocks:
+            for index in np.arange(0, len(block.elementLabels)):
+                values.append(FieldValue(block.instance, int(block.elementLabels[index]), block.data[index]))
+        return values
+
+
+# Class representing a frame of a step
+class OdbFrame:
+    def __init__(self, field_outputs):
+        self.fieldOutputs = field_outputs
+
+
+# Class representing a step
+class OdbStep:
+    def __init__(self, name, frames):
+        self.name = name
+        self.frames = frames
+
+
+# Class representing an output database with a single step and frame, the stresses map the upper case instance names to
+# the element labels and the centroid stresses of the instance
+class Odb:
+    def __init__(self, name, stresses):
+        self.name = name
+        blocks = []
+        for instance_name in sorted(stresses.keys()):
+            labels, values = stresses[instance_name]
+            blocks.append(FieldBulkData(OdbInstance(instance_name), labels, values))
+        frame = OdbFrame({'S': FieldOutput('S', blocks)})
+        self.steps = {'Step-1': OdbStep('Step-1', [frame])}
+
+    def close(self):
+        pass
+
+
+# Class representing the session, output databases have to be registered in odbs before they can be opened
+class Session:
+    def __init__(self):
+        self.odbs = {}
+
+    # Opens a registered output database
+    def openOdb(self, name, readOnly=True):
+        if name not in self.odbs:
+            raise IOError('Output database ' + name + ' is not registered with the stand-in session')
+        return self.odbs[name]
+
+
+# Utility method to write the input file of a model, with a part for each instance
+def write_input_file(model, file_name):
+    instances = model.rootAssembly.allInstances
+    out = open(file_name, 'w')
+    out.write('*Heading\n** Job name: ' + file_name[:-4] + ' Model name: ' + model.name + '\n')
+    out.write('*Preprint, echo=NO, model=NO, history=NO, contact=NO\n**\n** PARTS\n**\n')
+    for instance_key in sorted(instances.keys()):
+        instance = instances[instance_key]
+        nodes = instance.nodes
+        elements = instance.elements
+        out.write('*Part, name=' + instance.part.name + '\n*Node\n')
+        np.savetxt(out, np.column_stack((nodes.labels, nodes.coordinates)), fmt=['%7d'] + ['%13g']*3,
+                   delimiter=',')
+        out.write('*Element, type=' + instance.part.element_type + '\n')
+        np.savetxt(out, np.column_stack((elements.labels, elements.connectivity + 1)), fmt='%d', delimiter=', ')
+        out.write('*Elset, elset=Set-All, generate\n 1, ' + str(len(elements)) + ', 1\n')
+        out.write('** Section: Section-1\n*Solid Section, elset=Set-All, material=Material-1\n,\n*End Part\n**\n')
+    out.write('**\n** ASSEMBLY\n**\n*Assembly, name=Assembly\n**\n')
+    for instance_key in sorted(instances.keys()):
+        out.write('*Instance, name=' + instance_key + ', part=' + instances[instance_key].part.name + '\n')
+        out.write('*End Instance\n**\n')
+    # The nodes at the bottom of each instance are clamped
+    for instance_key in sorted(instances.keys()):
+        nodes = instances[instance_key].nodes
+        bottom = nodes.labels[nodes.coordinates[:, 2] <= nodes.coordinates[:, 2].min()]
+        out.write('*Nset, nset=Set-Fixed-' + instance_key + ', instance=' + instance_key + '\n')
+        write_labels(out, bottom)
+    out.write('*End Assembly\n**\n** MATERIALS\n**\n*Material, name=Material-1\n*Elastic\n200000., 0.3\n')
+    out.write('**\n** BOUNDARY CONDITIONS\n**\n')
+    for instance_key in sorted(instances.keys()):
+        out.write('** Name: BC-Fixed-' + instance_key + ' Type: Symmetry/Antisymmetry/Encastre\n*Boundary\n')
+        out.write('Set-Fixed-' + instance_key + ', ENCASTRE\n')
+    out.write('** ----------------------------------------------------------------\n**\n** STEP: Step-1\n**\n')
+    out.write('*Step, name=Step-1, nlgeom=NO\n*Static\n1., 1., 1e-05, 1.\n**\n** OUTPUT REQUESTS\n**\n')
+    out.write('*Output, field, variable=PRESELECT\n*End Step\n')
+    out.close()
+
+
+# Utility method to write labels to an input file, 16 per line as Abaqus does
+def write_labels(out, labels):
+    for start in np.arange(0, len(labels), 16):
+        out.write(', '.join(['%d' % label for label in labels[start:start + 16]]) + '\n')
+
+
+# Global model database and session, as in Abaqus
+mdb = Mdb()
+session = Session()
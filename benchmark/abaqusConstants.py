@@ -0,0 +1,10 @@
+# Stand-in for the abaqusConstants module, defining only the symbolic constants used by the plugin kernel
+# Output positions
+CENTROID = 'CENTROID'
+INTEGRATION_POINT = 'INTEGRATION_POINT'
+# Job states
+SUBMITTED = 'SUBMITTED'
+RUNNING = 'RUNNING'
+COMPLETED = 'COMPLETED'
+ABORTED = 'ABORTED'
+TERMINATED = 'TERMINATED'
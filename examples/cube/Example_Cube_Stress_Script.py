@@ -51,3 +51,15 @@ def calculate_stress(part, x, y, z, prev_stress):
     # since equilibration in previous iterations might have resulted in non-zero stresses for the other components,
     # we return all previous stress components, overwriting the target stress components we do care about
     return [s_xx, s_yy, prev_stress[2], prev_stress[3], prev_stress[4], prev_stress[5]]
+
+
+# The optional "calculate_stress_batch" method, which the ABAQUS plugin will call instead of "calculate_stress" if it is
+# defined, to determine the desired stress for all points in a part at once
+def calculate_stress_batch(part, xs, ys, zs, prev_stresses):
+    # Start from the previous stress components, undefined previous stresses are NaN and are set to zero
+    stresses = npy.nan_to_num(prev_stresses)
+    # Then, overwrite the target stress components we do care about
+    stresses[:, 0] = amp_x*npy.sin(zs*2*npy.pi/w)
+    stresses[:, 1] = amp_y*npy.sin(zs*2*npy.pi/w)
+    # Return the stress tensors as an array of shape (N, 6)
+    return stresses